@@ -0,0 +1,100 @@
+"""
+Compares IAU "data" storage layouts by file size and 2D slice read latency.
+
+Usage:
+    python benchmarks/bench_iau_layout.py [--shape 256 256 64 8] [--reads 50]
+"""
+
+# ----------------------------------------------------------------------------------
+
+import argparse
+import os
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+from iautil import io
+
+# ----------------------------------------------------------------------------------
+
+LAYOUTS = {
+    "contiguous": {},
+    "plane chunks": {"chunks": True},
+    "plane chunks + lzf": {"compression": "lzf"},
+    "plane chunks + gzip": {"compression": "gzip", "compression_opts": 4},
+    "plane chunks + shuffle + gzip": {
+        "compression": "gzip", 
+        "compression_opts": 4, 
+        "shuffle": True
+    },
+}
+
+# ----------------------------------------------------------------------------------
+
+def _make_data(shape: tuple) -> np.ndarray:
+    """
+    Synthetic detector-like data: a few Gaussian peaks over sparse Poisson noise.
+    """
+
+    rng = np.random.default_rng(0)
+    grids = np.meshgrid(*[np.linspace(-1, 1, n) for n in shape[:3]], indexing="ij")
+    peaks = np.exp(-sum(g ** 2 for g in grids) / 0.05) * 1e4
+    data = np.repeat(peaks[..., np.newaxis], shape[3], axis=-1)
+    data += rng.poisson(0.2, size=shape)
+
+    return data.astype(np.float32)
+
+# ----------------------------------------------------------------------------------
+
+def _time_plane_reads(iau_path: str, reads: int) -> float:
+    """
+    Mean time (ms) to read random data[:, :, z, t] planes from a cold file handle.
+    """
+
+    rng = np.random.default_rng(1)
+    times = []
+
+    with h5py.File(iau_path, "r") as iau_file:
+        dataset = iau_file["data"]
+        for _ in range(reads):
+            z = rng.integers(dataset.shape[2])
+            t = rng.integers(dataset.shape[3])
+            start = time.perf_counter()
+            dataset[:, :, z, t]
+            times.append(time.perf_counter() - start)
+
+    return 1e3 * float(np.mean(times))
+
+# ----------------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shape", type=int, nargs=4, default=[256, 256, 64, 8])
+    parser.add_argument("--reads", type=int, default=50)
+    args = parser.parse_args()
+
+    data = _make_data(tuple(args.shape))
+    coords = [list(range(n)) for n in data.shape]
+
+    print(f"data shape {data.shape}, {data.nbytes / 1e6:.1f} MB in memory")
+    print(f"{'layout':<32}{'write (s)':>10}{'size (MB)':>12}{'slice (ms)':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, layout in LAYOUTS.items():
+            iau_path = os.path.join(tmp_dir, f"{name.replace(' ', '_')}.iau")
+
+            start = time.perf_counter()
+            io.create_iau(iau_path, data, coords=coords, metadata={}, **layout)
+            write_time = time.perf_counter() - start
+
+            size = os.path.getsize(iau_path) / 1e6
+            latency = _time_plane_reads(iau_path, args.reads)
+
+            print(f"{name:<32}{write_time:>10.2f}{size:>12.1f}{latency:>12.2f}")
+
+# ----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
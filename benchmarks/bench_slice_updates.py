@@ -0,0 +1,153 @@
+"""
+Measures ImageTool frames drawn per second while stepping the z and t 
+sliders, as when dragging them. Slider steps are coalesced by the update 
+scheduler, so frames are counted where they are drawn. By default the plane 
+cache and prefetcher are disabled so every frame is read and rendered.
+
+Usage:
+    python benchmarks/bench_slice_updates.py [--shape 1000 1000 50 4] [--iau FILE] 
+        [--steps 100] [--rate 120] [--cached]
+
+Set QT_QPA_PLATFORM=offscreen to run without a display.
+"""
+
+# ----------------------------------------------------------------------------------
+
+import argparse
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import xarray as xr
+
+from iautil import io
+
+# ----------------------------------------------------------------------------------
+
+def _make_data_array(shape: tuple) -> xr.DataArray:
+    """
+    Random 4D DataArray with positive values.
+    """
+
+    rng = np.random.default_rng(0)
+    data = rng.random(shape, dtype=np.float32) * 1000 + 1
+
+    return xr.DataArray(
+        data=data,
+        coords=[np.arange(n) * 0.1 for n in shape],
+        dims=["H", "K", "L", "scan"]
+    )
+
+# ----------------------------------------------------------------------------------
+
+def _time_slider(
+    app, 
+    controller, 
+    slider, 
+    steps: int, 
+    rate: float, 
+    cached: bool
+) -> tuple:
+    """
+    Steps a slider back and forth at rate steps per second, processing events 
+    in between, and counts the frames the controller actually draws. Unless 
+    cached, the plane cache is cleared before each step so every frame is read 
+    and rendered.
+
+    Returns:
+        steps_per_second (float): Slider steps per second
+        frames_per_second (float): Frames drawn per second
+        frame_time (float): Mean time to draw a frame in ms
+    """
+
+    values = np.arange(steps) % (slider.maximum() + 1)
+
+    # Each run of the scheduled function draws one frame
+    scheduler = controller.update_scheduler
+    update = scheduler.function
+    frame_times = []
+
+    def timed_update():
+        start = time.perf_counter()
+        update()
+        frame_times.append(time.perf_counter() - start)
+
+    scheduler.function = timed_update
+
+    start = time.perf_counter()
+    for k, value in enumerate(values):
+        # Paces steps like mouse move events while dragging
+        while time.perf_counter() < start + k / rate:
+            app.processEvents()
+        if not cached:
+            controller.plane_cache.clear()
+        slider.setValue(int(value))
+        app.processEvents()
+
+    # Flushes the trailing frame of the last burst
+    while scheduler.timer.isActive():
+        time.sleep(0.001)
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+
+    scheduler.function = update
+
+    frame_time = np.mean(frame_times) * 1e3 if len(frame_times) > 0 else 0.0
+
+    return steps / elapsed, len(frame_times) / elapsed, frame_time
+
+# ----------------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shape", type=int, nargs=4, default=[1000, 1000, 50, 4])
+    parser.add_argument(
+        "--iau", type=str, default=None, help="lazily loaded IAU file"
+    )
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=120, help="slider steps/s")
+    parser.add_argument(
+        "--cached", 
+        action="store_true", 
+        help="keep the plane cache and prefetcher, as in normal use"
+    )
+    args = parser.parse_args()
+
+    app = pg.mkQApp("ImageTool benchmark")
+
+    from iautil.plotting.image_tool import ImageToolWidget
+
+    if args.iau is not None:
+        data_array = io.iau_to_data_array(args.iau, lazy=True)
+    else:
+        data_array = _make_data_array(tuple(args.shape))
+
+    widget = ImageToolWidget(data_array)
+    widget.show()
+    app.processEvents()
+
+    controller = widget.data_array_controller
+    if not args.cached:
+        controller.prefetcher.depth = 0
+
+    max_fps = controller.update_scheduler.max_fps
+    print(f"data shape {data_array.shape}, max_fps {max_fps}")
+    for i in range(2, data_array.ndim):
+        dim_ctrl = controller.layout.itemAt(i).widget()
+        steps_per_second, fps, frame_time = _time_slider(
+            app, 
+            controller, 
+            dim_ctrl.value_slider, 
+            args.steps, 
+            args.rate, 
+            args.cached
+        )
+        print(
+            f"{dim_ctrl.dim_lbl.text()} slider: {steps_per_second:.1f} steps/s, "
+            f"{fps:.1f} frames/s, {frame_time:.1f} ms/frame"
+        )
+
+# ----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
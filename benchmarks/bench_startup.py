@@ -0,0 +1,83 @@
+"""
+Measures import time of the I/O, analysis, and viewer entry points with
+`python -X importtime`, each in a fresh interpreter.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeats 5] [--top 5]
+"""
+
+# ----------------------------------------------------------------------------------
+
+import argparse
+import os
+import subprocess
+import sys
+
+# ----------------------------------------------------------------------------------
+
+ENTRY_POINTS = {
+    "io": "iautil.io",
+    "analysis": "iautil.analysis",
+    "viewer": "iautil.plotting.image_tool",
+}
+
+# ----------------------------------------------------------------------------------
+
+def _import_times(module: str) -> dict:
+    """
+    Cumulative import time in microseconds of every module imported by module.
+    """
+
+    # Imports of the repository, not an installed copy
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [os.getcwd(), env.get("PYTHONPATH")])
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True
+    )
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+# ----------------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, module in ENTRY_POINTS.items():
+        runs = [_import_times(module) for i in range(args.repeats)]
+        best = min(runs, key=lambda times: times[module])
+
+        print(f"{name} ({module}): {best[module] / 1e3:.0f} ms")
+
+        # Heaviest top-level dependencies
+        dependencies = sorted(
+            (
+                (cumulative, dependency) for dependency, cumulative in best.items()
+                if dependency != module and "." not in dependency
+            ),
+            reverse=True
+        )
+        for cumulative, dependency in dependencies[:args.top]:
+            print(f"    {dependency:<24}{cumulative / 1e3:>8.0f} ms")
+
+# ----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
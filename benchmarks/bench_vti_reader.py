@@ -0,0 +1,73 @@
+"""
+Compares the native VTI parser with VTK's XML reader on a directory of scans.
+
+Usage:
+    python benchmarks/bench_vti_reader.py [VTI_DIR] [--repeats 3]
+"""
+
+# ----------------------------------------------------------------------------------
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from iautil import io
+
+# ----------------------------------------------------------------------------------
+
+READERS = {
+    "native": io._read_vti,
+    "vtk": io._load_vti_vtk,
+}
+
+# ----------------------------------------------------------------------------------
+
+def _time_reader(reader, vti_paths: list, repeats: int) -> float:
+    """
+    Best time in seconds to read every file once.
+    """
+
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        for vti_path in vti_paths:
+            reader(vti_path)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+# ----------------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("vti_dir", nargs="?", default="tests/test_files")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    vti_paths = io._list_vti(args.vti_dir)
+    file_size = sum(os.path.getsize(vti_path) for vti_path in vti_paths) / 1e6
+
+    # Both readers must agree before their times mean anything
+    for vti_path in vti_paths:
+        data, coords = io._read_vti(vti_path)
+        vtk_data, vtk_coords = io._load_vti_vtk(vti_path)
+        if not np.array_equal(data, vtk_data) or not all(
+            np.array_equal(axis, vtk_axis)
+            for axis, vtk_axis in zip(coords, vtk_coords)
+        ):
+            raise RuntimeError(f"Readers differ on {vti_path}.")
+
+    print(f"{len(vti_paths)} files, {file_size:.1f} MB on disk")
+    print(f"{'reader':<10}{'total (s)':>12}{'per file (ms)':>16}{'MB/s':>10}")
+
+    for name, reader in READERS.items():
+        total = _time_reader(reader, vti_paths, args.repeats)
+        per_file = total / len(vti_paths) * 1e3
+        print(f"{name:<10}{total:>12.3f}{per_file:>16.2f}{file_size / total:>10.1f}")
+
+# ----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+"""
+Analysis functions that do not depend on Qt, for:
+- Extracting 2D planes from a DataArray
+- Interpolated line cuts
+- Rectangular ROI statistics
+- Saving ROI definitions and applying them to many IAU files
+"""
+
+# ----------------------------------------------------------------------------------
+
+from concurrent import futures
+import json
+import numpy as np
+import os
+from typing import List
+import xarray as xr
+
+from iautil import io
+
+# ----------------------------------------------------------------------------------
+
+__all__ = (
+    "get_plane",
+    "line_profile",
+    "roi_reduce",
+    "get_index_bounds",
+    "SummedAreaTable",
+    "apply_roi",
+    "save_roi",
+    "load_roi",
+    "batch_apply_roi"
+)
+
+# ----------------------------------------------------------------------------------
+
+# Reductions available for ROI statistics
+STATISTICS = ("mean", "sum", "max", "std")
+
+# ----------------------------------------------------------------------------------
+
+def get_plane(data_array: xr.DataArray, dims: tuple, indices: list) -> xr.DataArray:
+    """
+    Returns the (x, y) plane of a DataArray at the given indices of its other
+    dimensions. Only the plane is read from lazily loaded DataArrays.
+
+    Parameters:
+        data_array (xr.DataArray): DataArray with any dimension order
+        dims (tuple): Dimension order, x and y first
+        indices (list): Index for each dimension after x and y
+
+    Returns:
+        data_array_slice (xr.DataArray): 2D DataArray with dims x and y
+    """
+
+    data_array_slice = data_array.isel(dict(zip(dims[2:], indices)))
+
+    # Only the plane is read, then transposed in memory
+    return data_array_slice.load().transpose(*dims[:2])
+
+# ----------------------------------------------------------------------------------
+
+def line_profile(
+    data_array: xr.DataArray, 
+    start: tuple, 
+    end: tuple, 
+    n_samples: int = None, 
+    width: float = 1
+):
+    """
+    Samples a DataArray along a line segment in the plane of its first two 
+    dimensions, with bilinear interpolation between neighbouring pixels. Only the
+    bounding box of the line is read, so lazily loaded DataArrays stay on disk.
+
+    Parameters:
+        data_array (xr.DataArray): DataArray with at least two dimensions
+        start (tuple): (Fractional) x and y index of first endpoint
+        end (tuple): (Fractional) x and y index of second endpoint
+        n_samples (int): Number of points along the line, defaults to one per
+            pixel of length
+        width (float): Width of the line in pixels. Samples across the width are
+            averaged
+
+    Returns:
+        profile (xr.DataArray): DataArray with the sampled line as its first 
+            dimension, followed by the remaining dimensions of data_array
+        indices (tuple): Nearest x and y indices of each sample
+    """
+
+    x_dim, y_dim = data_array.dims[:2]
+    shape = data_array.shape
+    start, end = np.asarray(start, dtype=float), np.asarray(end, dtype=float)
+    direction = end - start
+    length = np.hypot(*direction)
+
+    if n_samples is None:
+        n_samples = int(np.ceil(length)) + 1
+    if n_samples < 1:
+        raise ValueError("n_samples must be a positive integer.")
+
+    # Points along the line, then offsets across its width
+    line = start + np.linspace(0, 1, n_samples)[:, np.newaxis] * direction
+    n_lines = max(1, int(round(width)))
+    if n_lines > 1 and length > 0:
+        normal = np.array([-direction[1], direction[0]]) / length
+        offsets = np.linspace(-(width - 1) / 2, (width - 1) / 2, n_lines)
+        points = line[:, np.newaxis] + offsets[:, np.newaxis] * normal
+    else:
+        points = line[:, np.newaxis]
+
+    # Samples outside the image take the value of the nearest edge
+    x = np.clip(points[..., 0], 0, shape[0] - 1)
+    y = np.clip(points[..., 1], 0, shape[1] - 1)
+
+    # Reads bounding box of samples
+    x_lo, y_lo = int(np.floor(x.min())), int(np.floor(y.min()))
+    x_hi = min(int(np.floor(x.max())) + 2, shape[0])
+    y_hi = min(int(np.floor(y.max())) + 2, shape[1])
+    box = data_array[x_lo:x_hi, y_lo:y_hi].values
+
+    # Neighbouring pixels and bilinear weights
+    x, y = x - x_lo, y - y_lo
+    x_0 = np.minimum(np.floor(x).astype(int), box.shape[0] - 1)
+    y_0 = np.minimum(np.floor(y).astype(int), box.shape[1] - 1)
+    x_1 = np.minimum(x_0 + 1, box.shape[0] - 1)
+    y_1 = np.minimum(y_0 + 1, box.shape[1] - 1)
+    extra_dims = (np.newaxis,) * (data_array.ndim - 2)
+    f_x = (x - x_0)[(...,) + extra_dims]
+    f_y = (y - y_0)[(...,) + extra_dims]
+
+    values = (
+        box[x_0, y_0] * ((1 - f_x) * (1 - f_y)) 
+        + box[x_1, y_0] * (f_x * (1 - f_y))
+        + box[x_0, y_1] * ((1 - f_x) * f_y) 
+        + box[x_1, y_1] * (f_x * f_y)
+    ).mean(axis=1)
+
+    # Coordinates of the nearest pixel, interpolated for numeric x/y coords
+    slice_dim = f"{x_dim}, {y_dim}"
+    x_center = np.clip(line[:, 0], 0, shape[0] - 1)
+    y_center = np.clip(line[:, 1], 0, shape[1] - 1)
+    indices = np.rint(x_center).astype(int), np.rint(y_center).astype(int)
+    coords = data_array.coords.to_dataset().isel(
+        {
+            x_dim: xr.DataArray(indices[0], dims=slice_dim), 
+            y_dim: xr.DataArray(indices[1], dims=slice_dim)
+        },
+        missing_dims="ignore"
+    ).coords
+    for dim, center in [(x_dim, x_center), (y_dim, y_center)]:
+        if dim in data_array.coords and data_array[dim].dtype.kind in "iuf":
+            coords[dim] = (
+                slice_dim, 
+                np.interp(center, np.arange(len(data_array[dim])), data_array[dim])
+            )
+
+    profile = xr.DataArray(
+        values, 
+        coords=coords, 
+        dims=(slice_dim,) + data_array.dims[2:],
+        attrs=data_array.attrs
+    )
+
+    return profile, indices
+
+# ----------------------------------------------------------------------------------
+
+def roi_reduce(
+    data_array: xr.DataArray, 
+    x_slice: slice, 
+    y_slice: slice, 
+    statistic: str = "mean"
+) -> xr.DataArray:
+    """
+    Reduces a rectangular region of the first two dimensions of a DataArray for 
+    every index of the remaining dimensions at once. Only the region is read from
+    lazily loaded DataArrays.
+
+    Parameters:
+        data_array (xr.DataArray): DataArray with at least two dimensions
+        x_slice (slice): Index range of the first dimension
+        y_slice (slice): Index range of the second dimension
+        statistic (str): "mean", "sum", "max", or "std"
+
+    Returns:
+        values (xr.DataArray): Statistic over the remaining dimensions
+    """
+
+    if statistic not in STATISTICS:
+        raise ValueError("statistic must be 'mean', 'sum', 'max', or 'std'.")
+
+    region = data_array[x_slice, y_slice]
+
+    return getattr(region, statistic)(dim=data_array.dims[:2])
+
+# ----------------------------------------------------------------------------------
+
+def get_index_bounds(shape: tuple, x_range: tuple, y_range: tuple) -> tuple:
+    """
+    Maps a rectangle in (fractional) index space to index ranges. Pixels partially
+    inside the rectangle are included, and the ranges always hold at least one 
+    pixel.
+
+    Parameters:
+        shape (tuple): Shape of the first two dimensions
+        x_range (tuple): Edges of the rectangle along the first dimension
+        y_range (tuple): Edges of the rectangle along the second dimension
+
+    Returns:
+        x_slice (slice): x index range
+        y_slice (slice): y index range
+    """
+
+    bounds = []
+    for n, edges in zip(shape, [x_range, y_range]):
+        edges = sorted(edges)
+        start = int(np.clip(np.floor(edges[0]), 0, n - 1))
+        stop = int(np.clip(np.ceil(edges[1]), start + 1, n))
+        bounds.append(slice(start, stop))
+
+    return tuple(bounds)
+
+# ----------------------------------------------------------------------------------
+
+class SummedAreaTable:
+    """
+    Integral image over the first two dimensions of a DataArray, kept for every
+    index of the remaining dimensions. Sums, means, and standard deviations of
+    any rectangle then take four lookups per plane, regardless of its area.
+    """
+
+    def __init__(self, data_array: xr.DataArray) -> None:
+        self.dims = data_array.dims
+
+        # Coordinates of the remaining dimensions, as kept by a reduction
+        self.coords = data_array.coords.to_dataset().drop_dims(
+            self.dims[:2], errors="ignore"
+        ).coords
+
+        # Subtracting the plane means keeps sums of squares small, so stds do 
+        # not cancel to noise when the data sits on a large offset
+        values = np.array(data_array.values, dtype=np.float64)
+        self.offset = values.mean(axis=(0, 1))
+        values -= self.offset
+
+        # Squared in place, so building holds one copy of the data besides the 
+        # two tables
+        self.table = self._integrate(values)
+        self.square_table = self._integrate(np.square(values, out=values))
+
+    # ------------------------------------------------------------------------------
+
+    def _integrate(self, values: np.ndarray) -> np.ndarray:
+        """
+        Cumulative sum over the first two axes, zero-padded at the start.
+        """
+
+        table = np.zeros(
+            (values.shape[0] + 1, values.shape[1] + 1) + values.shape[2:],
+            dtype=np.float64
+        )
+        np.cumsum(values, axis=0, out=table[1:, 1:])
+        np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+
+        return table
+
+    # ------------------------------------------------------------------------------
+
+    def _region_sum(self, table: np.ndarray, x_slice: slice, y_slice: slice):
+        x_0, x_1, _ = x_slice.indices(table.shape[0] - 1)
+        y_0, y_1, _ = y_slice.indices(table.shape[1] - 1)
+
+        return table[x_1, y_1] - table[x_0, y_1] - table[x_1, y_0] + table[x_0, y_0]
+
+    # ------------------------------------------------------------------------------
+
+    def reduce(
+        self, 
+        x_slice: slice, 
+        y_slice: slice, 
+        statistic: str = "mean"
+    ) -> xr.DataArray:
+        """
+        Reduces a rectangular region for every index of the remaining dimensions.
+
+        Parameters:
+            x_slice (slice): Index range of the first dimension
+            y_slice (slice): Index range of the second dimension
+            statistic (str): "mean", "sum", or "std"
+
+        Returns:
+            values (xr.DataArray): Statistic over the remaining dimensions
+        """
+
+        if statistic not in ["mean", "sum", "std"]:
+            raise ValueError("statistic must be 'mean', 'sum', or 'std'.")
+
+        # Sum of the offset values
+        values = self._region_sum(self.table, x_slice, y_slice)
+
+        x_size = len(range(*x_slice.indices(self.table.shape[0] - 1)))
+        y_size = len(range(*y_slice.indices(self.table.shape[1] - 1)))
+        area = x_size * y_size
+
+        if statistic == "sum":
+            values = values + area * self.offset
+        else:
+            mean = values / area
+
+            if statistic == "mean":
+                values = mean + self.offset
+            else:
+                squares = self._region_sum(self.square_table, x_slice, y_slice)
+                values = np.sqrt(np.maximum(squares / area - mean ** 2, 0))
+
+        return xr.DataArray(values, coords=self.coords, dims=self.dims[2:])
+
+# ----------------------------------------------------------------------------------
+
+def apply_roi(data_array: xr.DataArray, roi: dict) -> xr.DataArray:
+    """
+    Applies an ROI definition to a DataArray.
+
+    ROI definitions are dicts in coordinate space:
+    - {"type": "rect", "dims": [...], "x": [x_1, x_2], "y": [y_1, y_2], 
+      "statistic": "mean"}
+    - {"type": "line", "dims": [...], "start": [x, y], "end": [x, y], 
+      "width": 1, "sample_density": 1}
+    "dims" orders the DataArray so the ROI lies in the plane of the first two.
+
+    Parameters:
+        data_array (xr.DataArray): DataArray with the dims of the ROI
+        roi (dict): ROI definition
+
+    Returns:
+        values (xr.DataArray): ROI statistic for every plane, or line cut
+    """
+
+    _check_roi(roi)
+
+    if "dims" in roi:
+        if sorted(roi["dims"]) != sorted(data_array.dims):
+            raise ValueError("ROI dims must be a permutation of the DataArray dims.")
+        data_array = data_array.transpose(*roi["dims"])
+
+    if roi["type"] == "rect":
+        x_slice, y_slice = get_index_bounds(
+            data_array.shape,
+            [_to_index(data_array, 0, x) for x in roi["x"]],
+            [_to_index(data_array, 1, y) for y in roi["y"]]
+        )
+        statistic = roi.get("statistic", "mean")
+
+        return roi_reduce(data_array, x_slice, y_slice, statistic)
+
+    start = [_to_index(data_array, i, roi["start"][i]) for i in range(2)]
+    end = [_to_index(data_array, i, roi["end"][i]) for i in range(2)]
+    length = np.hypot(end[0] - start[0], end[1] - start[1])
+
+    profile, indices = line_profile(
+        data_array, 
+        start, 
+        end, 
+        n_samples=max(2, int(np.ceil(length * roi.get("sample_density", 1))) + 1),
+        width=roi.get("width", 1)
+    )
+
+    return profile
+
+# ----------------------------------------------------------------------------------
+
+def _check_roi(roi: dict) -> None:
+    """
+    Checks ROI definition for a type and its required keys.
+    """
+
+    if type(roi) != dict:
+        raise ValueError("ROI must be a dict.")
+    if roi.get("type") == "rect":
+        required = ["x", "y"]
+    elif roi.get("type") == "line":
+        required = ["start", "end"]
+    else:
+        raise ValueError("ROI type must be 'rect' or 'line'.")
+
+    for key in required:
+        if key not in roi:
+            raise ValueError(f"{roi['type']} ROI must have '{key}'.")
+
+# ----------------------------------------------------------------------------------
+
+def _to_index(data_array: xr.DataArray, axis: int, value: float) -> float:
+    """
+    Maps a coordinate value to a (fractional) index like the ImageTool axes, 
+    which start at the first coordinate and step by the first spacing. Non-numeric
+    or non-monotonic coordinates are given as indices.
+    """
+
+    dim = data_array.dims[axis]
+    if dim not in data_array.coords or data_array.shape[axis] < 2:
+        return value
+
+    values = data_array.coords[dim].values
+    dx = np.diff(values) if values.dtype.kind in "iuf" else None
+    if dx is None or not (np.all(dx <= 0) or np.all(dx >= 0)) or dx[0] == 0:
+        return value
+
+    return (value - values[0]) / dx[0]
+
+# ----------------------------------------------------------------------------------
+
+def save_roi(roi: dict, roi_path: str) -> None:
+    """
+    Writes an ROI definition to a JSON file.
+
+    Parameters:
+        roi (dict): ROI definition, see apply_roi
+        roi_path (str): Path of JSON file
+    """
+
+    _check_roi(roi)
+
+    with open(roi_path, "w") as roi_file:
+        json.dump(roi, roi_file, indent=4)
+
+# ----------------------------------------------------------------------------------
+
+def load_roi(roi_path: str) -> dict:
+    """
+    Reads an ROI definition from a JSON file.
+
+    Parameters:
+        roi_path (str): Path of JSON file
+
+    Returns:
+        roi (dict): ROI definition, see apply_roi
+    """
+
+    with open(roi_path) as roi_file:
+        roi = json.load(roi_file)
+
+    _check_roi(roi)
+
+    return roi
+
+# ----------------------------------------------------------------------------------
+
+def batch_apply_roi(
+    iau_paths, 
+    roi: dict, 
+    n_workers: int = None,
+    use_processes: bool = True
+) -> List[xr.DataArray]:
+    """
+    Applies an ROI definition to many IAU files in parallel. Each file is loaded
+    lazily, so only the planes the ROI touches are read.
+
+    Parameters:
+        iau_paths (list or str): IAU file paths, or a directory of IAU files
+        roi (dict): ROI definition or path of JSON file, see apply_roi
+        n_workers (int): Number of workers, defaults to one per CPU
+        use_processes (bool): Workers are processes instead of threads
+
+    Returns:
+        results (list): Result of apply_roi for each file, in order of iau_paths
+    """
+
+    if type(roi) == str:
+        roi = load_roi(roi)
+    _check_roi(roi)
+
+    if type(iau_paths) == str:
+        if not os.path.isdir(iau_paths):
+            raise ValueError("iau_paths must be a list of files or a directory.")
+        iau_paths = sorted(
+            os.path.join(iau_paths, f) 
+            for f in os.listdir(iau_paths) if f.endswith(".iau")
+        )
+    if n_workers is not None and (type(n_workers) != int or n_workers < 1):
+        raise ValueError("n_workers must be a positive integer.")
+
+    if use_processes:
+        executor = futures.ProcessPoolExecutor(max_workers=n_workers)
+    else:
+        executor = futures.ThreadPoolExecutor(max_workers=n_workers)
+
+    with executor:
+        return list(executor.map(_apply_roi_to_iau, iau_paths, [roi] * len(iau_paths)))
+
+# ----------------------------------------------------------------------------------
+
+def _apply_roi_to_iau(iau_path: str, roi: dict) -> xr.DataArray:
+    """
+    Loads an IAU file lazily, applies an ROI definition, and closes the file.
+    """
+
+    data_array = io.iau_to_data_array(iau_path, lazy=True)
+
+    try:
+        return apply_roi(data_array, roi).load()
+    finally:
+        data_array.close()
+
+# ----------------------------------------------------------------------------------
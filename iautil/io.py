@@ -3,25 +3,38 @@ Basic I/O functions for:
 - Creating IAU file from manual arguments
 - Creating IAU file from a .vti (VTK Image Data) file/directory
 - Creating an xarray DataArray from a IAU file
+- Exporting DataArrays and slices to CSV, NetCDF, and Zarr
 """
 
 # ----------------------------------------------------------------------------------
 
 import ast
+import base64
+from concurrent import futures
 import h5py
 import numpy as np
 import os
+import re
 from typing import List
-import vtk
-from vtk.util import numpy_support as npSup # type: ignore
 import xarray as xr
+from xarray.backends import BackendArray, CachingFileManager
+from xarray.core import indexing
+from xml.etree import ElementTree
+import zlib
 
 # ----------------------------------------------------------------------------------
 
 __all__ = (
     "create_iau",
     "vti_to_iau",
-    "iau_to_data_array"
+    "append_vti_to_iau",
+    "iau_to_data_array",
+    "LazyDataset",
+    "create_csv",
+    "data_array_to_netcdf",
+    "data_array_to_zarr",
+    "netcdf_to_data_array",
+    "zarr_to_data_array"
 )
 
 # ----------------------------------------------------------------------------------
@@ -31,7 +44,14 @@ def create_iau(
     data: np.ndarray,
     coords: list = None,
     dims: list = None,
-    metadata: dict = None
+    metadata: dict = None,
+    chunks=None,
+    compression: str = None,
+    compression_opts: int = None,
+    shuffle: bool = False,
+    resizable: bool = False,
+    pyramid_levels: int = 0,
+    stats: bool = True
 ):
     """
     Creates IAU file.
@@ -42,6 +62,16 @@ def create_iau(
     coords (list): A list of lists of coordinates for each dimension of dataset.
     dims (list): A list of labels for each dimension of dataset.
     metadata (dict): Metadata for file.
+    chunks (tuple or bool): Chunk shape for data. True chunks by 2D plane, which 
+        matches how ImageTool reads slices. None stores data contiguously.
+    compression (str): "gzip" or "lzf" compression filter for data.
+    compression_opts (int): gzip compression level (0-9).
+    shuffle (bool): Applies the HDF5 shuffle filter before compression.
+    resizable (bool): Allows the last dimension to grow (see append_vti_to_iau).
+    pyramid_levels (int): Number of block-averaged copies of data, each halving
+        the first two dimensions, for viewing zoomed-out planes.
+    stats (bool): Stores statistics of each plane of data and a histogram of its
+        values (see iau_to_data_array). Skipping them speeds up ingest.
     """
 
     if iau_path is None:
@@ -69,22 +99,489 @@ def create_iau(
     if None not in [coords, dims] and len(coords) != len(dims):
         raise RuntimeError("Dimension sizes for coords and dims do not match.")
 
+    _check_pyramid_levels(pyramid_levels)
+
+    layout = _get_layout(
+        data.shape, chunks, compression, compression_opts, shuffle, resizable
+    )
+
     with h5py.File(iau_path, "a") as new_file:
-        new_file.create_dataset("data", data=data)
-        new_file.attrs["metadata"] = str(metadata)
-        new_file.create_group("axes")
+        new_file.create_dataset("data", data=data, **layout)
+        _write_iau_info(new_file, coords, dims, metadata, resizable)
+        _write_pyramid(new_file, pyramid_levels, data=data)
+
+        # Statistics are kept for planes of real numbers only
+        if stats and data.ndim >= 2 and data.dtype.kind in "iuf":
+            _create_stats(new_file, resizable)
+            _write_stats(new_file, *_compute_stats(data))
+
+# ----------------------------------------------------------------------------------
+
+def _write_iau_info(
+    iau_file: h5py.File,
+    coords: list = None,
+    dims: list = None,
+    metadata: dict = None,
+    resizable: bool = False
+) -> None:
+    """
+    Writes metadata, dimension labels, and axis scales for an existing "data" 
+    dataset. With resizable, the last axis scale can grow along with the data.
+    """
+
+    ndim = iau_file["data"].ndim
+
+    _write_metadata(iau_file.create_group("metadata", track_order=True), metadata)
+    iau_file.create_group("axes")
+
+    if dims is None:
+        dims = [f"dim_{i}" for i in range(ndim)]
+
+    for i in range(ndim):
+        iau_file["data"].dims[i].label = dims[i]
+
+        if coords is not None:
+            axis = np.array(coords[i])
+            if resizable and i == ndim - 1:
+                iau_file.create_dataset(f"axes/axis_{i}", data=axis, maxshape=(None,))
+            else:
+                iau_file.create_dataset(f"axes/axis_{i}", data=axis)
+            iau_file[f"axes/axis_{i}"].make_scale(dims[i])
+            iau_file["data"].dims[i].attach_scale(iau_file[f"axes/axis_{i}"])
+
+# ----------------------------------------------------------------------------------
+
+# Escaped keys never contain "/", so this attribute cannot collide with one
+_LITERALS = "/literals"
+
+# ----------------------------------------------------------------------------------
+
+def _escape_key(key: str) -> str:
+    """
+    Escapes "/", which HDF5 reads as a path separator, and "%" in a metadata key.
+    """
+
+    return key.replace("%", "%25").replace("/", "%2F")
+
+# ----------------------------------------------------------------------------------
+
+def _unescape_key(key: str) -> str:
+    return re.sub("%(25|2F)", lambda match: chr(int(match.group(1), 16)), key)
+
+# ----------------------------------------------------------------------------------
+
+def _write_metadata(group: h5py.Group, metadata: dict = None) -> None:
+    """
+    Writes a metadata dict to an HDF5 group. Scalars and strings become 
+    attributes, numeric and string arrays become datasets, and nested dicts 
+    become subgroups. Other values are stored as Python literals.
+    """
+
+    if metadata is None:
+        return
+
+    literals = []
+
+    for key, value in metadata.items():
+        key = _escape_key(str(key))
+
+        if isinstance(value, dict):
+            _write_metadata(group.create_group(key, track_order=True), value)
+            continue
+
+        if value is None:
+            group.attrs[key] = h5py.Empty("f")
+            continue
+
+        if isinstance(value, (str, bool, int, float, np.number, np.bool_)):
+            try:
+                group.attrs[key] = value
+                continue
+            except TypeError:
+                # Integers beyond 64 bits
+                pass
+
+        if isinstance(value, (list, tuple, np.ndarray)):
+            try:
+                array = np.asarray(value)
+            except ValueError:
+                # Ragged lists
+                array = np.empty(0, dtype=object)
+            if array.dtype.kind in "biuf":
+                group.create_dataset(key, data=array)
+                continue
+            # NumPy also converts mixed lists like [1, "a"] to strings
+            items = np.asarray(value, dtype=object).ravel()
+            if array.dtype.kind == "U" and all(isinstance(i, str) for i in items):
+                group.create_dataset(
+                    key, data=array.astype(object), dtype=h5py.string_dtype()
+                )
+                continue
+
+        # Mixed lists, complex numbers, etc.
+        group.attrs[key] = str(value)
+        literals.append(key)
+
+    if len(literals) > 0:
+        group.attrs[_LITERALS] = literals
+
+# ----------------------------------------------------------------------------------
+
+def _read_metadata(group: h5py.Group, iau_path: str) -> dict:
+    """
+    Reads a metadata group written by _write_metadata. Attributes are read 
+    immediately, datasets are returned as LazyDataset objects.
+    """
+
+    metadata = {}
+    literals = list(group.attrs.get(_LITERALS, []))
+
+    for key, value in group.attrs.items():
+        if key == _LITERALS:
+            continue
+
+        if isinstance(value, h5py.Empty):
+            value = None
+        elif key in literals:
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                pass
+        elif isinstance(value, np.generic):
+            value = value.item()
+
+        metadata[_unescape_key(key)] = value
+
+    for key, item in group.items():
+        if isinstance(item, h5py.Group):
+            metadata[_unescape_key(key)] = _read_metadata(item, iau_path)
+        else:
+            metadata[_unescape_key(key)] = LazyDataset(
+                iau_path, item.name, item.shape, item.dtype
+            )
+
+    return metadata
+
+# ----------------------------------------------------------------------------------
+
+class LazyDataset:
+    """
+    Metadata array stored in an IAU file. Values are read from the file when 
+    indexed or converted with np.asarray, so large arrays cost nothing until 
+    they are used.
+    """
+
+    def __init__(self, iau_path: str, name: str, shape: tuple, dtype) -> None:
+        self.iau_path = iau_path
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    def __getitem__(self, key):
+        with h5py.File(self.iau_path, "r") as iau_file:
+            dataset = iau_file[self.name]
+            if h5py.check_string_dtype(dataset.dtype) is not None:
+                dataset = dataset.asstr()
+            return dataset[key]
+
+    def __array__(self, dtype=None):
+        array = np.asarray(self[()])
+        return array if dtype is None else array.astype(dtype)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    def __repr__(self) -> str:
+        return f"LazyDataset({self.name!r}, shape={self.shape}, dtype={self.dtype})"
+
+# ----------------------------------------------------------------------------------
+
+def _check_pyramid_levels(pyramid_levels: int) -> None:
+    if type(pyramid_levels) != int or pyramid_levels < 0:
+        raise ValueError("pyramid_levels must be a non-negative integer.")
+
+# ----------------------------------------------------------------------------------
+
+# Number of points averaged at once when building levels from memory
+_PYRAMID_BLOCK_SIZE = 2 ** 22
+
+# ----------------------------------------------------------------------------------
+
+def _write_pyramid(
+    iau_file: h5py.File, 
+    pyramid_levels: int, 
+    start: int = 0, 
+    data: np.ndarray = None
+) -> None:
+    """
+    Writes block-averaged copies of the "data" dataset to the "pyramid" group. 
+    Each level averages 2x2 blocks of the first two dimensions of the level 
+    before it. Existing levels are extended from index start of the last 
+    dimension, one index at a time, so only one scan is held in memory. With 
+    data, the in-memory copy of "data", levels are built from it and written 
+    whole instead of being read back from the file.
+    """
+
+    source = iau_file["data"] if data is None else data
+    resizable = source.ndim > 2 and iau_file["data"].maxshape[-1] is None
+
+    for level in range(1, pyramid_levels + 1):
+        name = f"pyramid/level_{level}"
+        shape = (-(-source.shape[0] // 2), -(-source.shape[1] // 2)) + source.shape[2:]
+        dtype = np.result_type(source.dtype, np.float32)
+
+        if name not in iau_file:
+            iau_file.create_dataset(
+                name,
+                shape=shape,
+                dtype=dtype,
+                chunks=_get_plane_chunks(shape),
+                maxshape=shape[:-1] + (None,) if resizable else None
+            )
+        elif resizable:
+            iau_file[name].resize(shape[-1], axis=len(shape) - 1)
+        pyramid_level = iau_file[name]
+
+        if data is not None:
+            # Averaged in blocks of the last dimension to bound float64 copies
+            level_data = np.empty(shape, dtype=dtype)
+            if source.ndim == 2:
+                level_data[...] = _block_mean(source)
+            else:
+                step = max(1, _PYRAMID_BLOCK_SIZE // int(np.prod(source.shape[:-1])))
+                for i in range(0, source.shape[-1], step):
+                    level_data[..., i:i + step] = _block_mean(source[..., i:i + step])
+            pyramid_level[...] = level_data
+            source = level_data
+            continue
+
+        if source.ndim == 2:
+            pyramid_level[...] = _block_mean(source[...])
+        else:
+            for i in range(start, source.shape[-1]):
+                pyramid_level[..., i] = _block_mean(source[..., i])
+
+        source = pyramid_level
+
+# ----------------------------------------------------------------------------------
+
+def _block_mean(data: np.ndarray) -> np.ndarray:
+    """
+    Averages 2x2 blocks of the first two axes. Blocks at odd edges average the
+    points they contain.
+    """
+
+    pad = [(0, data.shape[0] % 2), (0, data.shape[1] % 2)]
+    shape = (-(-data.shape[0] // 2), 2, -(-data.shape[1] // 2), 2)
+
+    sums = np.pad(data.astype(np.float64), pad + [(0, 0)] * (data.ndim - 2))
+    sums = sums.reshape(shape + data.shape[2:]).sum(axis=(1, 3))
+    counts = np.pad(np.ones(data.shape[:2]), pad).reshape(shape).sum(axis=(1, 3))
+
+    return sums / counts[(...,) + (np.newaxis,) * (data.ndim - 2)]
+
+# ----------------------------------------------------------------------------------
+
+# Per-plane statistics stored in the "stats" group
+_PLANE_STATS = {
+    "min": np.float64, 
+    "max": np.float64, 
+    "positive_min": np.float64, 
+    "sum": np.float64, 
+    "nonzero": np.int64
+}
+
+# Range of binary exponents of positive float64 values (see np.frexp)
+_MIN_EXPONENT, _MAX_EXPONENT = -1073, 1024
+
+# ----------------------------------------------------------------------------------
+
+def _create_stats(iau_file: h5py.File, resizable: bool = False) -> None:
+    """
+    Creates the "stats" group of an IAU file: per-plane statistics over the 
+    first two dimensions of "data", and a histogram of positive values with one
+    bin per power of two.
+    """
+
+    shape = iau_file["data"].shape[2:]
+    resizable = resizable and len(shape) > 0
+
+    stats = iau_file.create_group("stats")
+    for name, dtype in _PLANE_STATS.items():
+        stats.create_dataset(
+            name, 
+            shape=shape, 
+            dtype=dtype,
+            maxshape=shape[:-1] + (None,) if resizable else None
+        )
+    stats.create_dataset(
+        "histogram", 
+        data=np.zeros(_MAX_EXPONENT - _MIN_EXPONENT + 1, dtype=np.int64)
+    )
+
+# ----------------------------------------------------------------------------------
+
+def _compute_stats(data: np.ndarray) -> tuple:
+    """
+    Computes statistics of the planes of data over its first two dimensions, 
+    and the histogram of its positive values, in one pass over the array.
 
-        if dims is None:
-            dims = [f"dim_{i}" for i in range(data.ndim)]
+    Returns:
+    plane_stats (dict): Arrays of data.shape[2:] for each name in _PLANE_STATS.
+    histogram (np.ndarray): Counts of positive values per binary exponent.
+    """
+
+    # Planes without positive values have an infinite positive_min
+    positive = data > 0
+    initial = np.iinfo(data.dtype).max if data.dtype.kind in "iu" else np.inf
+    positive_min = np.where(
+        np.any(positive, axis=(0, 1)),
+        np.amin(data, axis=(0, 1), where=positive, initial=initial),
+        np.inf
+    )
+
+    plane_stats = {
+        "min": np.amin(data, axis=(0, 1)),
+        "max": np.amax(data, axis=(0, 1)),
+        "positive_min": positive_min,
+        "sum": np.sum(data, axis=(0, 1), dtype=np.float64),
+        "nonzero": np.count_nonzero(data, axis=(0, 1))
+    }
+
+    # Floats keep their exponent in their own precision, integers need float64
+    values = data[positive]
+    if values.dtype.kind != "f":
+        values = values.astype(np.float64)
+    _, exponents = np.frexp(values)
+    histogram = np.bincount(
+        exponents - _MIN_EXPONENT, minlength=_MAX_EXPONENT - _MIN_EXPONENT + 1
+    )
 
-        for i in range(len(coords)):
-            new_file["data"].dims[i].label = dims[i]
+    return plane_stats, histogram
 
-            if coords is not None:
-                axis = np.array(coords[i])
-                new_file.create_dataset(f"axes/axis_{i}", data=axis)
-                new_file[f"axes/axis_{i}"].make_scale(dims[i])
-                new_file["data"].dims[i].attach_scale(new_file[f"axes/axis_{i}"])
+# ----------------------------------------------------------------------------------
+
+def _write_stats(
+    iau_file: h5py.File, 
+    plane_stats: dict, 
+    histogram: np.ndarray, 
+    index=...
+) -> None:
+    """
+    Writes plane statistics at index of the "stats" datasets, growing them to 
+    fit a slice of the last dimension, and adds histogram to the stored one. 
+    Each dataset is written once, so callers accumulate statistics in memory.
+    """
+
+    stats = iau_file["stats"]
+    if index is not ... and stats["min"].shape[-1] < index[-1].stop:
+        for name in _PLANE_STATS:
+            stats[name].resize(index[-1].stop, axis=stats[name].ndim - 1)
+
+    for name, values in plane_stats.items():
+        stats[name][index] = values
+    stats["histogram"][...] += histogram
+
+# ----------------------------------------------------------------------------------
+
+def _stack_stats(scan_stats: List[dict]) -> dict:
+    """
+    Stacks the plane statistics of consecutive scans along a new last dimension.
+    """
+
+    return {
+        name: np.stack([plane_stats[name] for plane_stats in scan_stats], axis=-1)
+        for name in _PLANE_STATS
+    }
+
+# ----------------------------------------------------------------------------------
+
+def _read_stats(stats: h5py.Group, coords: list, dims: list) -> xr.Dataset:
+    """
+    Reads the "stats" group of an IAU file into a Dataset with the coords of 
+    the file. The histogram is trimmed to its non-empty bins, with bin i holding
+    values in [bin_edges[i], bin_edges[i + 1]).
+    """
+
+    data_vars = {name: (dims[2:], stats[name][...]) for name in _PLANE_STATS}
+
+    histogram = stats["histogram"][...]
+    filled = np.nonzero(histogram)[0]
+    if len(filled) == 0:
+        filled = np.array([0])
+    first, last = filled[0], filled[-1]
+
+    data_vars["histogram"] = ("bin", histogram[first:last + 1])
+    data_vars["histogram_bin_edges"] = (
+        "bin_edge", np.ldexp(0.5, np.arange(first, last + 2) + _MIN_EXPONENT)
+    )
+
+    return xr.Dataset(data_vars, coords=dict(zip(dims, coords)))
+
+# ----------------------------------------------------------------------------------
+
+def _get_layout(
+    shape: tuple,
+    chunks=None,
+    compression: str = None,
+    compression_opts: int = None,
+    shuffle: bool = False,
+    resizable: bool = False
+) -> dict:
+    """
+    Builds h5py storage keyword arguments for the "data" dataset.
+
+    Filters and resizing require chunked storage, so plane chunks are used 
+    whenever either is requested without an explicit chunk shape.
+    """
+
+    if compression not in [None, "gzip", "lzf"]:
+        raise ValueError("compression must be 'gzip' or 'lzf'.")
+    if compression_opts is not None and compression != "gzip":
+        raise ValueError("compression_opts is only supported for gzip compression.")
+
+    if chunks in [None, False] and (compression is not None or shuffle or resizable):
+        chunks = True
+
+    if chunks is True:
+        chunks = _get_plane_chunks(shape)
+    elif chunks is not None and chunks is not False:
+        chunks = tuple(chunks)
+        if len(chunks) != len(shape):
+            raise ValueError("chunks must have the same number of dimensions as data.")
+    else:
+        chunks = None
+
+    layout = {}
+    if chunks is not None:
+        layout["chunks"] = chunks
+    if compression is not None:
+        layout["compression"] = compression
+        layout["compression_opts"] = compression_opts
+    if shuffle:
+        layout["shuffle"] = True
+    if resizable:
+        layout["maxshape"] = tuple(shape[:-1]) + (None,)
+
+    return layout
+
+# ----------------------------------------------------------------------------------
+
+def _get_plane_chunks(shape: tuple) -> tuple:
+    """
+    Returns a chunk shape holding one full plane of the first two dimensions.
+
+    ImageTool displays data[:, :, z, t] by default, so each displayed slice 
+    maps to a single chunk.
+    """
+
+    return tuple(
+        max(size, 1) if i < 2 else 1 for i, size in enumerate(shape)
+    )
 
 # ----------------------------------------------------------------------------------
 
@@ -93,7 +590,16 @@ def vti_to_iau(
     iau_path: str,
     new_dim_coords: list = None,
     dims: list = None,
-    metadata: dict = None
+    metadata: dict = None,
+    chunks=None,
+    compression: str = None,
+    compression_opts: int = None,
+    shuffle: bool = False,
+    n_workers: int = None,
+    use_processes: bool = False,
+    streaming: bool = False,
+    pyramid_levels: int = 0,
+    stats: bool = True
 ):
     """
     Creates IAU file from VTI file(s).
@@ -104,6 +610,20 @@ def vti_to_iau(
     coords (list): A list of lists of coordinates for each dimension of dataset.
     dims (list): A list of labels for each dimension of dataset.
     metadata (dict): Metadata for file.
+    chunks (tuple or bool): Chunk shape for data (see create_iau).
+    compression (str): "gzip" or "lzf" compression filter for data.
+    compression_opts (int): gzip compression level (0-9).
+    shuffle (bool): Applies the HDF5 shuffle filter before compression.
+    n_workers (int): Number of workers decoding VTI files from a directory 
+        concurrently. None or 1 loads files serially.
+    use_processes (bool): Uses worker processes instead of threads.
+    streaming (bool): Writes each VTI file of a directory straight into its slice
+        of a preallocated dataset, so only about one scan is held in memory.
+    pyramid_levels (int): Number of block-averaged levels (see create_iau).
+    stats (bool): Stores per-plane statistics (see create_iau).
+
+    Files created from a directory have a resizable last dimension and can be
+    extended with append_vti_to_iau.
     """
 
     if vti_path is None:
@@ -111,18 +631,46 @@ def vti_to_iau(
     if type(vti_path) != str:
         raise ValueError("VTI path must be a string.")
 
+    if n_workers is not None:
+        if type(n_workers) != int or n_workers < 1:
+            raise ValueError("n_workers must be a positive integer.")
+
+    _check_pyramid_levels(pyramid_levels)
+
     # Data source as directory
     if os.path.isdir(vti_path):
-        file_list = os.listdir(vti_path) # directory contents, sorted
-        file_list.sort()
+        vti_file_list = _list_vti(vti_path)
+
+        if len(vti_file_list) == 0:
+            raise RuntimeError("No VTI files found in directory.")
+
+        if streaming:
+            _stream_vti_to_iau(
+                vti_file_list=vti_file_list,
+                iau_path=iau_path,
+                new_dim_coords=new_dim_coords,
+                dims=dims,
+                metadata=metadata,
+                layout=dict(
+                    chunks=chunks,
+                    compression=compression,
+                    compression_opts=compression_opts,
+                    shuffle=shuffle,
+                    resizable=True
+                ),
+                n_workers=n_workers,
+                use_processes=use_processes,
+                pyramid_levels=pyramid_levels,
+                stats=stats
+            )
+            return
+
         data_list, coords_list = [], []
 
-        for file in file_list:
-            if file.endswith(".vti"):
-                data, coords = _load_vti(str(os.path.join(vti_path, file)))
-                data_list.append(data)
-                coords_list.append(coords)
-        data, coords = _stitch(data_list, coords_list)
+        for data, coords in _iter_vti(vti_file_list, n_workers, use_processes):
+            data_list.append(data)
+            coords_list.append(coords)
+        data, coords = _stitch(data_list, coords_list, vti_file_list)
 
         # Handles new axis values 
         if new_dim_coords is None:
@@ -141,28 +689,304 @@ def vti_to_iau(
         data=data,
         coords=coords,
         dims=dims,
-        metadata=metadata
+        metadata=metadata,
+        chunks=chunks,
+        compression=compression,
+        compression_opts=compression_opts,
+        shuffle=shuffle,
+        resizable=os.path.isdir(vti_path),
+        pyramid_levels=pyramid_levels,
+        stats=stats
     )
 
+    # Records source files so later appends can skip them
+    if os.path.isdir(vti_path):
+        with h5py.File(iau_path, "a") as iau_file:
+            _write_sources(iau_file, vti_file_list)
+
+# ----------------------------------------------------------------------------------
+
+def append_vti_to_iau(
+    vti_path: str,
+    iau_path: str,
+    new_dim_coords: list = None,
+    n_workers: int = None,
+    use_processes: bool = False
+) -> List[str]:
+    """
+    Appends new VTI file(s) to an IAU file created from a VTI directory.
+
+    Files already stored in the IAU file are skipped, so a directory that 
+    receives new scans during an experiment can be appended repeatedly at a 
+    cost proportional to the new scans only.
+
+    Parameters:
+    vti_path (str): VTI file or directory of VTI files.
+    iau_path (str): Existing IAU file with a resizable last dimension.
+    new_dim_coords (list): Coordinates of the appended files along the last 
+        dimension. Defaults to continuing the index count.
+    n_workers (int): Number of workers decoding VTI files concurrently.
+    use_processes (bool): Uses worker processes instead of threads.
+
+    Returns:
+    appended_files (list): Paths of the VTI files that were appended.
+    """
+
+    if vti_path is None:
+        raise ValueError("VTI path not given.")
+    if type(vti_path) != str:
+        raise ValueError("VTI path must be a string.")
+
+    if n_workers is not None:
+        if type(n_workers) != int or n_workers < 1:
+            raise ValueError("n_workers must be a positive integer.")
+
+    if os.path.isdir(vti_path):
+        vti_file_list = _list_vti(vti_path)
+    elif os.path.isfile(vti_path):
+        vti_file_list = [vti_path]
+    else:
+        raise RuntimeError("Invalid VTI path.")
+
+    with h5py.File(iau_path, "a") as iau_file:
+        dataset = iau_file["data"]
+        if dataset.maxshape[-1] is not None:
+            raise RuntimeError("IAU file data is not resizable.")
+
+        sources = []
+        if "sources" in iau_file:
+            sources = list(iau_file["sources"].asstr()[...])
+        vti_file_list = [
+            vti_file for vti_file in vti_file_list 
+            if os.path.basename(vti_file) not in sources
+        ]
+        if len(vti_file_list) == 0:
+            return []
+
+        n_old = dataset.shape[-1]
+        n_new = len(vti_file_list)
+        if new_dim_coords is None:
+            new_dim_coords = [i for i in range(n_old, n_old + n_new)]
+        if len(new_dim_coords) != n_new:
+            raise RuntimeError("Number of new_dim_coords and new VTI files do not match.")
+
+        coords = [dataset.dims[i][0][...] for i in range(dataset.ndim - 1)]
+        new_dim_axis = dataset.dims[dataset.ndim - 1][0]
+        reference = sources[0] if len(sources) > 0 else iau_path
+
+        dataset.resize(n_old + n_new, axis=dataset.ndim - 1)
+        scan_stats, histogram = [], 0
+        try:
+            vti_iter = _iter_vti(vti_file_list, n_workers, use_processes)
+            for i, (data, new_coords) in enumerate(vti_iter):
+                if data.shape != dataset.shape[:-1]:
+                    raise ValueError(
+                        "Inconsistent data shapes throughout data source files: "
+                        f"{vti_file_list[i]} differs from {reference}."
+                    )
+                _check_coords([coords, new_coords], [reference, vti_file_list[i]])
+
+                dataset[..., n_old + i] = data
+                if "stats" in iau_file:
+                    plane_stats, scan_histogram = _compute_stats(data)
+                    scan_stats.append(plane_stats)
+                    histogram = histogram + scan_histogram
+        except Exception:
+            dataset.resize(n_old, axis=dataset.ndim - 1)
+            raise
+
+        # Written once all scans are in, so a failed append leaves them untouched
+        if "stats" in iau_file:
+            _write_stats(
+                iau_file, 
+                _stack_stats(scan_stats), 
+                histogram, 
+                (..., slice(n_old, n_old + n_new))
+            )
+
+        new_dim_axis.resize((n_old + n_new,))
+        new_dim_axis[n_old:] = new_dim_coords
+        _write_sources(iau_file, vti_file_list)
+
+        # Extends pyramid levels with the new scans only
+        if "pyramid" in iau_file:
+            _write_pyramid(iau_file, len(iau_file["pyramid"]), start=n_old)
+
+    return vti_file_list
+
+# ----------------------------------------------------------------------------------
+
+def _list_vti(vti_dir: str) -> List[str]:
+    """
+    Returns sorted paths of the VTI files in a directory.
+    """
+
+    file_list = os.listdir(vti_dir) # directory contents, sorted
+    file_list.sort()
+
+    return [
+        str(os.path.join(vti_dir, file)) 
+        for file in file_list if file.endswith(".vti")
+    ]
+
+# ----------------------------------------------------------------------------------
+
+def _write_sources(iau_file: h5py.File, vti_file_list: List[str]) -> None:
+    """
+    Appends VTI file names to the resizable "sources" dataset of an IAU file.
+    """
+
+    names = [os.path.basename(vti_file) for vti_file in vti_file_list]
+
+    if "sources" not in iau_file:
+        iau_file.create_dataset(
+            "sources", 
+            shape=(0,), 
+            maxshape=(None,), 
+            dtype=h5py.string_dtype()
+        )
+
+    sources = iau_file["sources"]
+    n_old = sources.shape[0]
+    sources.resize((n_old + len(names),))
+    sources[n_old:] = names
+
 # ----------------------------------------------------------------------------------
 
-def iau_to_data_array(iau_path: str):
+def _stream_vti_to_iau(
+    vti_file_list: List[str],
+    iau_path: str,
+    new_dim_coords: list = None,
+    dims: list = None,
+    metadata: dict = None,
+    layout: dict = None,
+    n_workers: int = None,
+    use_processes: bool = False,
+    pyramid_levels: int = 0,
+    stats: bool = True
+) -> None:
+    """
+    Creates IAU file from a list of VTI files without stacking them in memory.
+
+    The "data" dataset is allocated from the first file's shape with one extra
+    dimension, and each file is written into its own index along that dimension.
+    """
+
+    if dims is not None and type(dims) != list:
+        raise ValueError("dims must be a list.")
+    if metadata is not None and type(metadata) != dict:
+        raise ValueError("metadata must be a dictionary.")
+
+    if new_dim_coords is None:
+        new_dim_coords = [i for i in range(len(vti_file_list))]
+
+    with h5py.File(iau_path, "a") as new_file:
+        dataset, first_coords = None, None
+        scan_stats, histogram = [], 0
+
+        vti_iter = _iter_vti(vti_file_list, n_workers, use_processes)
+        for i, (data, coords) in enumerate(vti_iter):
+            if dataset is None:
+                # Checked before anything is written
+                if dims is not None and len(dims) != data.ndim + 1:
+                    raise RuntimeError(
+                        "Dimension sizes for coords and dims do not match."
+                    )
+
+                shape = data.shape + (len(vti_file_list),)
+                dataset = new_file.create_dataset(
+                    "data", 
+                    shape=shape, 
+                    dtype=data.dtype, 
+                    **_get_layout(shape, **layout)
+                )
+                first_coords = coords
+
+            # Checks if coords stay consistent throughout data source files
+            if data.shape != dataset.shape[:-1]:
+                raise ValueError(
+                    "Inconsistent data shapes throughout data source files: "
+                    f"{vti_file_list[i]} differs from {vti_file_list[0]}."
+                )
+            _check_coords([first_coords, coords], [vti_file_list[0], vti_file_list[i]])
+
+            dataset[..., i] = data
+            if stats:
+                plane_stats, scan_histogram = _compute_stats(data)
+                scan_stats.append(plane_stats)
+                histogram = histogram + scan_histogram
+
+        if stats:
+            _create_stats(new_file, resizable=True)
+            _write_stats(new_file, _stack_stats(scan_stats), histogram)
+
+        coords = first_coords + [new_dim_coords]
+        _write_iau_info(new_file, coords, dims, metadata, resizable=True)
+        _write_sources(new_file, vti_file_list)
+        _write_pyramid(new_file, pyramid_levels)
+
+# ----------------------------------------------------------------------------------
+
+def iau_to_data_array(iau_path: str, lazy: bool = False):
     """
     Retrieves data, axis info, and metadata from .iau file in an xarray dataset.
 
     Parameters:
         file (str): .iau file to load.
+        lazy (bool): If True, data values stay in the file and are read on demand.
+            The file is kept open until the DataArray's close() is called. Lazy 
+            DataArrays can be pickled and deep copied.
 
     Returns:
         data_array (xr.DataArray): Dataset containing data, axis info, and metadata.
+            Metadata arrays are LazyDataset objects, read from the file when 
+            indexed or passed to np.asarray. Pyramid levels written by 
+            create_iau are DataArrays in encoding["pyramid"], finest first. 
+            Per-plane statistics are in encoding["stats"], a Dataset with the 
+            file's coords and variables over all but the first two dimensions 
+            ("min", "max", "positive_min", "sum", "nonzero"), plus "histogram" 
+            counts of positive values and their "histogram_bin_edges".
     """
     
     # Reads info from .iau file
-    with h5py.File(iau_path, 'r') as iau_file:
-        data = iau_file["data"][...]
-        coords = [iau_file["data"].dims[i][0][...] for i in range(data.ndim)]
-        dims = [iau_file["data"].dims[i].label for i in range(data.ndim)]
-        metadata = ast.literal_eval(iau_file.attrs["metadata"])
+    manager = CachingFileManager(h5py.File, iau_path, mode="r")
+    iau_file = manager.acquire()
+
+    try:
+        ndim = iau_file["data"].ndim
+        coords = [iau_file["data"].dims[i][0][...] for i in range(ndim)]
+        dims = [iau_file["data"].dims[i].label for i in range(ndim)]
+        if "metadata" in iau_file:
+            metadata = _read_metadata(iau_file["metadata"], iau_path)
+        else:
+            # Files written before metadata groups store a Python literal
+            metadata = ast.literal_eval(iau_file.attrs["metadata"])
+
+        stats = None
+        if "stats" in iau_file:
+            stats = _read_stats(iau_file["stats"], coords, dims)
+
+        data = _read_dataset(manager, "data", lazy)
+
+        # Level k keeps every 2^k-th coordinate of the first two dimensions
+        pyramid = []
+        if "pyramid" in iau_file:
+            for level in range(1, len(iau_file["pyramid"]) + 1):
+                level_coords = [
+                    axis[::2 ** level] if i < 2 else axis 
+                    for i, axis in enumerate(coords)
+                ]
+                pyramid.append(xr.DataArray(
+                    data=_read_dataset(manager, f"pyramid/level_{level}", lazy),
+                    coords=level_coords,
+                    dims=dims
+                ))
+    except Exception:
+        manager.close()
+        raise
+
+    if not lazy:
+        manager.close()
 
     # Creates xarray DataArray from .iau info
     # Internal data structure for everything in image-analysis-util
@@ -173,11 +997,247 @@ def iau_to_data_array(iau_path: str):
         attrs=metadata
     )
 
+    if len(pyramid) > 0:
+        data_array.encoding["pyramid"] = pyramid
+    if stats is not None:
+        data_array.encoding["stats"] = stats
+
+    if lazy:
+        data_array.set_close(manager.close)
+
     return data_array
 
 # ----------------------------------------------------------------------------------
 
+def _read_dataset(manager: CachingFileManager, name: str, lazy: bool = False):
+    """
+    Reads a dataset, or wraps it for reading on demand if lazy.
+    """
+
+    if lazy:
+        # Indexing is deferred until values are requested
+        return indexing.LazilyIndexedArray(_IAUBackendArray(manager, name))
+
+    return manager.acquire()[name][...]
+
+# ----------------------------------------------------------------------------------
+
+class _IAUBackendArray(BackendArray):
+    """
+    Read-on-demand wrapper around a dataset of an IAU file. The file is opened 
+    through a CachingFileManager, so lazy DataArrays can be pickled and deep 
+    copied, and the file is reopened if it was closed.
+    """
+
+    def __init__(self, manager: CachingFileManager, name: str) -> None:
+        self.manager = manager
+        self.name = name
+
+        dataset = manager.acquire()[name]
+        self.shape = dataset.shape
+        self.dtype = dataset.dtype
+
+    def __getitem__(self, key):
+        # h5py only supports basic slicing reliably, xarray handles the rest
+        return indexing.explicit_indexing_adapter(
+            key,
+            self.shape,
+            indexing.IndexingSupport.BASIC,
+            self._getitem
+        )
+
+    def _getitem(self, key):
+        with self.manager.acquire_context() as iau_file:
+            return iau_file[self.name][key]
+
+# ----------------------------------------------------------------------------------
+
 def _load_vti(vti_path: str):
+    """
+    Reads the "Scalars_" point data and axis coordinates of a VTI file. Files 
+    the native parser does not support are read with VTK.
+    """
+
+    try:
+        return _read_vti(vti_path)
+    except _UnsupportedVTIError:
+        return _load_vti_vtk(vti_path)
+
+# ----------------------------------------------------------------------------------
+
+class _UnsupportedVTIError(Exception):
+    """
+    Raised by _read_vti for VTI files it cannot parse, which are then read with
+    VTK.
+    """
+
+# ----------------------------------------------------------------------------------
+
+# VTK DataArray types as NumPy type codes, without byte order
+_VTI_TYPES = {
+    "Int8": "i1", "UInt8": "u1", "Int16": "i2", "UInt16": "u2",
+    "Int32": "i4", "UInt32": "u4", "Int64": "i8", "UInt64": "u8",
+    "Float32": "f4", "Float64": "f8"
+}
+
+def _get_vti_type(vti_type: str) -> str:
+    """
+    Returns the NumPy type code of a VTK DataArray type.
+    """
+
+    if vti_type not in _VTI_TYPES:
+        raise _UnsupportedVTIError(f"Unsupported type {vti_type}.")
+
+    return _VTI_TYPES[vti_type]
+
+def _read_vti(vti_path: str):
+    """
+    Parses a single-piece VTI file into NumPy arrays without VTK. Supports 
+    ascii, inline binary, and raw or base64 appended data, optionally 
+    compressed with vtkZLibDataCompressor. Raises _UnsupportedVTIError for 
+    anything else.
+    """
+
+    with open(vti_path, "rb") as vti_file:
+        content = vti_file.read()
+
+    # Appended data is not XML, so only the part before it is parsed
+    appended = content.find(b"<AppendedData")
+    if appended == -1:
+        root = ElementTree.fromstring(content)
+    else:
+        root = ElementTree.fromstring(content[:appended] + b"</VTKFile>")
+
+    if root.get("type") != "ImageData":
+        raise _UnsupportedVTIError("Not a VTK ImageData file.")
+
+    compressor = root.get("compressor")
+    if compressor not in (None, "vtkZLibDataCompressor"):
+        raise _UnsupportedVTIError(f"Unsupported compressor {compressor}.")
+
+    byte_order = "<"
+    if root.get("byte_order", "LittleEndian") == "BigEndian":
+        byte_order = ">"
+    header_dtype = np.dtype(
+        byte_order + _get_vti_type(root.get("header_type", "UInt32"))
+    )
+
+    image_data = root.find("ImageData")
+    pieces = image_data.findall("Piece")
+    if len(pieces) != 1:
+        raise _UnsupportedVTIError("Only single-piece files are supported.")
+
+    data_array = pieces[0].find("PointData/DataArray[@Name='Scalars_']")
+    if data_array is None or int(data_array.get("NumberOfComponents", 1)) != 1:
+        raise _UnsupportedVTIError("No single-component Scalars_ array.")
+
+    dtype = np.dtype(_get_vti_type(data_array.get("type")))
+    data_format = data_array.get("format")
+
+    if data_format == "ascii":
+        data = np.array(data_array.text.split(), dtype=dtype)
+
+    else:
+        if data_format == "appended":
+            # Offsets count from the "_" that starts the appended data
+            tag_end = content.index(b">", appended)
+            encoding = re.search(rb'encoding="(\w+)"', content[appended:tag_end])
+            base64_encoded = encoding is not None and encoding.group(1) == b"base64"
+            buffer = memoryview(content)[content.index(b"_", tag_end) + 1:]
+            offset = int(data_array.get("offset"))
+        elif data_format == "binary":
+            buffer = "".join(data_array.text.split()).encode()
+            base64_encoded = True
+            offset = 0
+        else:
+            raise _UnsupportedVTIError(f"Unsupported format {data_format}.")
+
+        raw = _read_vti_block(
+            buffer, offset, header_dtype, compressor is not None, base64_encoded
+        )
+        data = np.frombuffer(raw, dtype=dtype.newbyteorder(byte_order))
+        if not data.flags.writeable or not data.dtype.isnative:
+            data = data.astype(dtype)
+
+    # First and last index of each axis
+    extent = [int(i) for i in image_data.get("WholeExtent").split()]
+    dimensions = [extent[2 * i + 1] - extent[2 * i] + 1 for i in range(3)]
+    data = data.reshape(dimensions)
+
+    # First point and space between points for each axis
+    origin = [float(i) for i in image_data.get("Origin", "0 0 0").split()]
+    spacing = [float(i) for i in image_data.get("Spacing", "1 1 1").split()]
+
+    # A list of arrays of varying lengths
+    coords = [
+        origin[i] + np.arange(extent[2 * i], extent[2 * i + 1] + 1) * spacing[i]
+        for i in range(3)
+    ]
+
+    return data, coords
+
+# ----------------------------------------------------------------------------------
+
+def _read_vti_block(
+    buffer,
+    offset: int,
+    header_dtype: np.dtype,
+    compressed: bool,
+    base64_encoded: bool
+):
+    """
+    Returns the decoded bytes of one binary VTI data block. Uncompressed 
+    blocks start with their byte count. Compressed blocks start with the number 
+    of blocks, the block size, the size of the last block, and the compressed 
+    size of each block.
+    """
+
+    def read(position: int, n_bytes: int):
+        # Returns n_bytes from position and the position after them
+        if not base64_encoded:
+            return buffer[position:position + n_bytes], position + n_bytes
+
+        n_chars = 4 * -(-n_bytes // 3)
+        decoded = base64.b64decode(buffer[position:position + n_chars])
+        return decoded[:n_bytes], position + n_chars
+
+    header_size = header_dtype.itemsize
+
+    if not compressed:
+        n_bytes = int(np.frombuffer(read(offset, header_size)[0], header_dtype)[0])
+        if base64_encoded:
+            # Header and data are encoded together
+            return read(offset, header_size + n_bytes)[0][header_size:]
+        return read(offset + header_size, n_bytes)[0]
+
+    header = np.frombuffer(read(offset, 3 * header_size)[0], header_dtype)
+    n_blocks, block_size, last_size = [int(i) for i in header]
+    if last_size == 0:
+        last_size = block_size
+
+    # Header and blocks are encoded separately
+    header, position = read(offset, (3 + n_blocks) * header_size)
+    compressed_sizes = np.frombuffer(header, header_dtype)[3:].astype(np.int64)
+    blocks = read(position, int(compressed_sizes.sum()))[0]
+
+    raw = bytearray(max(n_blocks - 1, 0) * block_size + last_size * (n_blocks > 0))
+    starts = np.concatenate(([0], np.cumsum(compressed_sizes)))
+    for i in range(n_blocks):
+        block = zlib.decompress(blocks[starts[i]:starts[i + 1]])
+        raw[i * block_size:i * block_size + len(block)] = block
+
+    return raw
+
+# ----------------------------------------------------------------------------------
+
+def _load_vti_vtk(vti_path: str):
+    """
+    Reads a VTI file with VTK's XML reader.
+    """
+
+    # VTK takes seconds to import, so it is loaded only when needed
+    import vtk
+    from vtk.util import numpy_support as npSup # type: ignore
 
     data_reader = vtk.vtkXMLImageDataReader()
     data_reader.SetFileName(vti_path)
@@ -193,37 +1253,67 @@ def _load_vti(vti_path: str):
     spacing = raw_data.GetSpacing() # Space between points for each axis
     extent = raw_data.GetExtent() # First and last index of each axis
 
-    axis_0, axis_1, axis_2 = [], [], []
+    # A list of arrays of varying lengths
+    coords = [
+        origin[i] + np.arange(extent[2 * i], extent[2 * i + 1] + 1) * spacing[i]
+        for i in range(3)
+    ]
+
+    return data, coords
 
-    for point in range(extent[0], extent[1] + 1):
-        axis_0.append(origin[0] + point * spacing[0])
-    for point in range(extent[2], extent[3] + 1):
-        axis_1.append(origin[1] + point * spacing[1])
-    for point in range(extent[4], extent[5] + 1):
-        axis_2.append(origin[2] + point * spacing[2])
+# ----------------------------------------------------------------------------------
 
-    # A list of lists of varying lengths
-    coords = [axis_0, axis_1, axis_2]
+def _iter_vti(
+    vti_file_list: List[str],
+    n_workers: int = None,
+    use_processes: bool = False
+):
+    """
+    Yields (data, coords) for each VTI file in order of vti_file_list.
 
-    return data, coords
+    With more than one worker, files are decoded concurrently while at most 
+    2 * n_workers results are held in memory at once.
+    """
+
+    if n_workers is None or n_workers == 1:
+        for vti_file in vti_file_list:
+            yield _load_vti(vti_file)
+        return
+
+    if use_processes:
+        executor = futures.ProcessPoolExecutor(max_workers=n_workers)
+    else:
+        executor = futures.ThreadPoolExecutor(max_workers=n_workers)
+
+    with executor:
+        pending = []
+        vti_files = iter(vti_file_list)
+
+        for vti_file in vti_files:
+            pending.append(executor.submit(_load_vti, vti_file))
+            if len(pending) == 2 * n_workers:
+                break
+
+        while len(pending) > 0:
+            # Results are consumed in submission order to preserve file order
+            result = pending.pop(0).result()
+            next_file = next(vti_files, None)
+            if next_file is not None:
+                pending.append(executor.submit(_load_vti, next_file))
+            yield result
 
 # ----------------------------------------------------------------------------------
 
 def _stitch(
     data_list: List[np.ndarray],
-    coords_list: List[list]
+    coords_list: List[list],
+    vti_file_list: List[str] = None
 ):
     data, coords = None, None
 
     # Checks if coords stay consistent throughout data source files
-    consistent_coords = coords_list.count(coords_list[0]) == len(coords_list)
-
-    if consistent_coords:
-        coords = coords_list[0]
-    else:
-        raise ValueError(
-            "Inconsistent coords throughout data source files."
-        )
+    _check_coords(coords_list, vti_file_list)
+    coords = list(coords_list[0])
 
     # Converts list of NumPy arrays (ndim = n) to one NumPy array (ndim = n + 1)
     data = np.stack(data_list, axis=-1)
@@ -232,57 +1322,244 @@ def _stitch(
 
 # ----------------------------------------------------------------------------------
 
-def create_csv(data, coords, labels, csv_path):
-    rows = []
-    headers = labels + ["Value"]
-    rows.append(headers)
-    if data.ndim == 2:
-        for x in range(data.shape[0]):
-            for y in range(data.shape[1]):
-                row = []
-                for i in range(len(coords)):
-                    if i != len(coords) - 1:
-                        row.append(coords[i][x])
-                    else:
-                        row.append(coords[i][y])
-                row.append(data[x][y])
-                rows.append(row)
-    elif data.ndim == 1:
-        for x in range(data.shape[0]):
-            row = []
-            for i in range(len(coords)):
-                row.append(coords[i][x])
-            row.append(data[x])
-            rows.append(row)
-
-    np.savetxt(
-        csv_path,
-        rows,
-        delimiter=",",
-        fmt ='% s'
-    )
+def _check_coords(
+    coords_list: List[list],
+    vti_file_list: List[str] = None,
+    rtol: float = 1e-05,
+    atol: float = 1e-08
+) -> None:
+    """
+    Raises a ValueError naming the first data source file whose coords differ 
+    from those of the first file, within floating point tolerance.
+    """
+
+    if vti_file_list is None:
+        vti_file_list = [f"file {i}" for i in range(len(coords_list))]
+
+    n_axes = len(coords_list[0])
+    mismatched = np.zeros(len(coords_list), dtype=bool)
+
+    for i in range(n_axes):
+        lengths = np.array([
+            len(coords[i]) if len(coords) == n_axes else -1 for coords in coords_list
+        ])
+        same_length = lengths == lengths[0]
+        mismatched |= ~same_length
+
+        # One comparison per axis across all files with matching lengths
+        axes = np.array([
+            coords_list[j][i] for j in np.flatnonzero(same_length)
+        ], dtype=float)
+        close = np.isclose(axes, axes[0], rtol=rtol, atol=atol).all(axis=1)
+        mismatched[np.flatnonzero(same_length)[~close]] = True
+
+    if mismatched.any():
+        diverged = np.argmax(mismatched)
+        raise ValueError(
+            "Inconsistent coords throughout data source files: "
+            f"{vti_file_list[diverged]} differs from {vti_file_list[0]}."
+        )
 
 # ----------------------------------------------------------------------------------
 
-'''def create_netcdf(data, coords, labels, nc_path):
-    
-    if data.ndim == 3:
-        adjusted_labels = [",".join(labels[:2]), labels[2], labels[3]]
-    elif data.ndim == 2:
-        adjusted_labels = [",".join(labels[:-1]), labels[-1]]
-    else:
-        adjusted_labels = [",".join(labels)]
+def create_csv(
+    data: np.ndarray,
+    coords: list,
+    labels: list,
+    csv_path: str,
+    block_size: int = 65536
+):
+    """
+    Writes a data slice and its coordinates to a CSV file, one row per point.
 
-    adjusted_coords = {}
-    for l, c in zip(labels, coords):
-        adjusted_coords[l] = c
+    The first len(coords) - data.ndim + 1 coordinate lists run along the first 
+    dimension of data (dimensions collapsed by a line cut share it), and each 
+    remaining list runs along one of the other dimensions.
 
-    data_array = xr.DataArray(
-        data,
-        dims=adjusted_labels,
-        coords=adjusted_coords
-    )
+    Parameters:
+    data (np.ndarray): 1D, 2D, or N-D array of values.
+    coords (list): A list of lists of coordinates.
+    labels (list): Column labels for coords.
+    csv_path (str): Path to save file in.
+    block_size (int): Number of rows formatted and written at a time.
+    """
+
+    data = np.asarray(data)
+
+    n_shared = len(coords) - data.ndim + 1
+    if n_shared < 1:
+        raise ValueError("coords must have a list for every dimension of data.")
+
+    # Dimension of data that each coordinate list runs along
+    coord_axes = [0] * n_shared + [i for i in range(1, data.ndim)]
+    coords = [np.asarray(c) for c in coords]
+    values = data.reshape(-1)
+
+    with open(csv_path, "w") as csv_file:
+        csv_file.write(",".join(map(str, list(labels) + ["Value"])) + "\n")
+
+        for start in range(0, values.size, block_size):
+            stop = min(start + block_size, values.size)
+            indices = np.unravel_index(np.arange(start, stop), data.shape)
+
+            # Columns are formatted by NumPy, then joined row-wise in one pass
+            columns = [
+                c[indices[axis]].astype(str).tolist() 
+                for c, axis in zip(coords, coord_axes)
+            ]
+            columns.append(values[start:stop].astype(str).tolist())
+
+            csv_file.write("\n".join(map(",".join, zip(*columns))) + "\n")
+
+# ----------------------------------------------------------------------------------
+
+def data_array_to_netcdf(data_array: xr.DataArray, nc_path: str):
+    """
+    Writes a DataArray (a full dataset or a slice) to a NetCDF4 file with h5netcdf.
+
+    Data is chunked by 2D plane like IAU files and, for 3D and higher DataArrays,
+    written one index of the last dimension at a time so lazily loaded arrays 
+    are read once, one plane at a time. Attributes that NetCDF cannot store 
+    (e.g. nested dictionaries) are dropped.
+
+    Parameters:
+    data_array (xr.DataArray): DataArray to save.
+    nc_path (str): Path to save file in.
+    """
+
+    try:
+        import h5netcdf
+    except ImportError:
+        raise ImportError("h5netcdf is required for NetCDF export.")
+
+    name, dataset = _to_dataset(data_array)
+    chunks = _get_plane_chunks(data_array.shape)
+
+    if data_array.ndim < 3 or data_array.dtype.kind not in "iuf":
+        encoding = {name: {"chunksizes": chunks}}
+        dataset.to_netcdf(nc_path, engine="h5netcdf", encoding=encoding)
+        return
+
+    # xarray writes the coordinates, the data variable is filled plane by plane
+    dataset.drop_vars(name).to_netcdf(nc_path, engine="h5netcdf")
+
+    with h5netcdf.File(nc_path, "a") as nc_file:
+        for dim, size in data_array.sizes.items():
+            if dim not in nc_file.dimensions:
+                nc_file.dimensions[dim] = size
+
+        variable = nc_file.create_variable(
+            name, data_array.dims, data_array.dtype, chunks=chunks
+        )
+        variable.attrs.update(dataset[name].attrs)
+
+        for i in range(data_array.shape[-1]):
+            variable[..., i] = data_array[..., i].values
+
+# ----------------------------------------------------------------------------------
+
+def data_array_to_zarr(data_array: xr.DataArray, zarr_path: str):
+    """
+    Writes a DataArray (a full dataset or a slice) to a chunked Zarr directory 
+    store.
+
+    Data is chunked by 2D plane and, for 3D and higher DataArrays, written one 
+    index of the last dimension at a time so lazily loaded arrays are never 
+    read into memory at once.
+
+    Parameters:
+    data_array (xr.DataArray): DataArray to save.
+    zarr_path (str): Directory path to save store in.
+    """
+
+    try:
+        import zarr # noqa: F401
+    except ImportError:
+        raise ImportError("zarr is required for Zarr export.")
+
+    name, dataset = _to_dataset(data_array)
+    encoding = {name: {"chunks": _get_plane_chunks(data_array.shape)}}
+
+    if data_array.ndim < 3:
+        dataset.to_zarr(zarr_path, mode="w", encoding=encoding)
+        return
+
+    # Each slice is read once and written from memory
+    last_dim = data_array.dims[-1]
+    for i in range(data_array.shape[-1]):
+        dataset_slice = dataset.isel({last_dim: slice(i, i + 1)}).load()
+        if i == 0:
+            dataset_slice.to_zarr(zarr_path, mode="w", encoding=encoding)
+        else:
+            dataset_slice.to_zarr(zarr_path, append_dim=last_dim)
+
+# ----------------------------------------------------------------------------------
+
+def netcdf_to_data_array(nc_path: str):
+    """
+    Lazily opens a DataArray saved with data_array_to_netcdf.
+
+    Parameters:
+    nc_path (str): NetCDF file to load.
+
+    Returns:
+    data_array (xr.DataArray): DataArray read from the file on demand.
+    """
+
+    return xr.open_dataarray(nc_path, engine="h5netcdf")
+
+# ----------------------------------------------------------------------------------
+
+def zarr_to_data_array(zarr_path: str):
+    """
+    Lazily opens a DataArray saved with data_array_to_zarr.
+
+    Parameters:
+    zarr_path (str): Zarr directory store to load.
+
+    Returns:
+    data_array (xr.DataArray): DataArray read from the store on demand.
+    """
+
+    return xr.open_dataarray(zarr_path, engine="zarr", chunks=None)
+
+# ----------------------------------------------------------------------------------
+
+def _to_dataset(data_array: xr.DataArray):
+    """
+    Wraps a DataArray in a Dataset with only serializable attributes.
+    """
+
+    name = data_array.name if data_array.name is not None else "data"
+
+    data_array = data_array.copy(deep=False)
+    data_array.attrs = _get_serializable_attrs(data_array.attrs)
+
+    # Encodings from the source file (e.g. pyramid levels) are not exported
+    data_array.encoding = {}
+
+    return name, data_array.to_dataset(name=name)
+
+# ----------------------------------------------------------------------------------
+
+def _get_serializable_attrs(attrs: dict) -> dict:
+    """
+    Keeps attributes that NetCDF and Zarr can store: strings, numbers, and 1D 
+    numeric arrays.
+    """
+
+    serializable_attrs = {}
+
+    for key, value in attrs.items():
+        if isinstance(value, (bool, np.bool_)):
+            serializable_attrs[key] = int(value)
+        elif isinstance(value, (str, int, float, np.number)):
+            serializable_attrs[key] = value
+        elif isinstance(value, (list, tuple, np.ndarray, LazyDataset)):
+            array = np.asarray(value)
+            if array.ndim == 1 and array.dtype.kind in "iuf":
+                serializable_attrs[key] = array
 
-    print(data_array)'''
+    return serializable_attrs
 
 # ----------------------------------------------------------------------------------
\ No newline at end of file
@@ -23,9 +23,13 @@ class ImageTool:
     Creates an instance of a QApplication and displays an ImageToolWidget object.
     """
 
-    app = pg.mkQApp("ImageTool")
+    # Created by the first ImageTool rather than on import
+    app = None
 
     def __init__(self, data_array: xr.DataArray) -> None:
+        if ImageTool.app is None:
+            ImageTool.app = pg.mkQApp("ImageTool")
+
         self.image_tool_widget = ImageToolWidget(data_array)
 
     # ------------------------------------------------------------------------------
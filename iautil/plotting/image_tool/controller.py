@@ -4,11 +4,16 @@ Controls DataArray slice in ImageView.
 
 # ----------------------------------------------------------------------------------
 
+from concurrent import futures
 import numpy as np
 import pyqtgraph as pg
 from PyQt5 import QtGui, QtCore
+import time
 import xarray as xr
 
+from iautil.analysis import get_plane
+from iautil.utilities.cache import LRUCache
+
 # ----------------------------------------------------------------------------------
 
 class DataArrayController(QtGui.QWidget):
@@ -18,11 +23,36 @@ class DataArrayController(QtGui.QWidget):
 
     updated = QtCore.pyqtSignal()
 
-    def __init__(self, data_array: xr.DataArray, parent=None) -> None:
+    def __init__(
+        self, 
+        data_array: xr.DataArray, 
+        parent=None,
+        cache_size: int = 256 * 2 ** 20,
+        max_fps: float = 30
+    ) -> None:
         super(DataArrayController, self).__init__(parent)
 
         self.parent = parent
-        self.data_array = data_array
+
+        # Source DataArray stays untouched, axis order is a mapping onto it
+        self.axis_permutation = AxisPermutation(data_array)
+
+        # Rendered planes keyed by axis order, z/t indices, and normalization
+        self.plane_cache = LRUCache(max_bytes=cache_size)
+
+        # Renders planes next to the displayed one in the background
+        self.prefetcher = SlicePrefetcher(self)
+
+        # Coalesces slider/combobox updates to at most max_fps renders per second
+        self.update_scheduler = UpdateScheduler(
+            self._update_image_view, max_fps, parent=self
+        )
+
+        # Pyramid level shown in ImageView, 0 is full resolution
+        self.pyramid_level = 0
+        view_box = self.parent.data_array_image_view.view.getViewBox()
+        view_box.sigRangeChanged.connect(self._update_pyramid_level)
+        view_box.sigResized.connect(self._update_pyramid_level)
 
         self.setAcceptDrops(True)
 
@@ -43,12 +73,22 @@ class DataArrayController(QtGui.QWidget):
 
             self.layout.addWidget(self.dim_ctrl_list[i])
 
-            self.dim_ctrl_list[i].updated.connect(self._update_image_view)
+            self.dim_ctrl_list[i].updated.connect(self.update_scheduler.request)
 
         self._update_axis_order()
 
     # ------------------------------------------------------------------------------
 
+    @property
+    def data_array(self) -> xr.DataArray:
+        """
+        DataArray with dimensions in displayed order (x, y, z, t).
+        """
+
+        return self.axis_permutation.view()
+
+    # ------------------------------------------------------------------------------
+
     def _update_axis_order(self) -> None:
         """
         Updates axis order to determine which slice is in view
@@ -68,20 +108,14 @@ class DataArrayController(QtGui.QWidget):
                 dim_ctrl.value_cbx.setEnabled(True)
         axis_order = tuple(axis_order)
 
-        if self.data_array.ndim == 2:
-            dim_0, dim_1 = axis_order
-            self.data_array = self.data_array.transpose(dim_0, dim_1)
-        if self.data_array.ndim == 3:
-            dim_0, dim_1, dim_2 = axis_order
-            self.data_array = self.data_array.transpose(dim_0, dim_1, dim_2)
-        if self.data_array.ndim == 4:
-            dim_0, dim_1, dim_2, dim_3 = axis_order
-            self.data_array = self.data_array.transpose(dim_0, dim_1, dim_2, dim_3)
-
-        self.updated.emit()
+        self.axis_permutation.set_order(axis_order)
+        self.pyramid_level = self.get_pyramid_level()
 
+        # Listeners read the new order from the ImageView, so it updates first
         self._update_image_view()
 
+        self.updated.emit()
+
     # ------------------------------------------------------------------------------
 
     def _update_image_view(self) -> None:
@@ -90,22 +124,140 @@ class DataArrayController(QtGui.QWidget):
         Determines slice to display in ImageView.
         """
 
-        if self.data_array.ndim == 2:
-            data_array_slice = self.data_array[:, :]
-        
-        if self.data_array.ndim == 3:
-            z = self.layout.itemAt(2).widget().value_slider.value()
-            data_array_slice = self.data_array[:, :, z]
-
-        if self.data_array.ndim == 4:
-            z = self.layout.itemAt(2).widget().value_slider.value()
-            t = self.layout.itemAt(3).widget().value_slider.value()
-            data_array_slice = self.data_array[:, :, z, t]
+        # Slider values for z and t
+        indices = [
+            self.layout.itemAt(i).widget().value_slider.value() 
+            for i in range(2, self.layout.count())
+        ]
+        image_view = self.parent.data_array_image_view
+
+        key = self.get_plane_key(indices)
+        cached_plane = self.plane_cache.get(key)
+
+        if cached_plane is None:
+            cached_plane = self.render_plane(key)
+            self.cache_plane(key, cached_plane)
+
+        data_array_slice, image = cached_plane
         
-        self.parent.data_array_image_view.set_data_array_slice(
+        image_view.set_data_array_slice(
             self.data_array,
-            data_array_slice
+            data_array_slice,
+            image
+        )
+
+        self.prefetcher.prefetch(indices)
+
+    # ------------------------------------------------------------------------------
+
+    def _update_pyramid_level(self) -> None:
+        """
+        Switches to the pyramid level that matches the view range.
+        """
+
+        pyramid_level = self.get_pyramid_level()
+
+        if pyramid_level != self.pyramid_level:
+            self.pyramid_level = pyramid_level
+            self.update_scheduler.request()
+
+    # ------------------------------------------------------------------------------
+
+    def get_pyramid_level(self) -> int:
+        """
+        Returns the coarsest pyramid level with at least one data point per screen
+        pixel in the current view range.
+        """
+
+        n_levels = self.axis_permutation.get_n_levels()
+        if n_levels == 0:
+            return 0
+
+        image_view = self.parent.data_array_image_view
+        view_box = image_view.view.getViewBox()
+        if view_box.width() <= 0 or view_box.height() <= 0:
+            return 0
+
+        # Full resolution data points per screen pixel
+        (x_1, x_2), (y_1, y_2) = view_box.viewRange()
+        pos, scale = image_view.get_axis_coords(self.data_array)
+        density = min(
+            abs((x_2 - x_1) / scale[0]) / view_box.width(),
+            abs((y_2 - y_1) / scale[1]) / view_box.height()
+        )
+
+        if density < 2:
+            return 0
+
+        return min(int(np.log2(density)), n_levels)
+
+    # ------------------------------------------------------------------------------
+
+    def get_plane_key(self, indices: list) -> tuple:
+        """
+        Returns cache key for the plane at the given z/t indices with the current
+        axis order, pyramid level, and normalization.
+        """
+
+        image_view = self.parent.data_array_image_view
+
+        return (
+            self.axis_permutation.dims, 
+            tuple(indices), 
+            self.pyramid_level,
+            image_view.norm, 
+            image_view.gamma
+        )
+
+    # ------------------------------------------------------------------------------
+
+    def render_plane(self, key: tuple) -> tuple:
+        """
+        Reads and normalizes the plane described by a cache key. Does not touch
+        any widgets, so it can run on a worker thread.
+
+        Returns:
+            plane (tuple): 2D DataArray and its rendered image
+        """
+
+        dims, indices, pyramid_level, norm, gamma = key
+
+        # Statistics stored at ingest give levels without scanning the plane
+        plane_stats = self.axis_permutation.get_plane_stats(indices, dims)
+
+        if plane_stats is not None and plane_stats["nonzero"] == 0:
+            # Empty planes are not read
+            data_array_slice = self.axis_permutation.get_empty_plane(
+                indices, dims, pyramid_level
+            )
+            image = (np.zeros(data_array_slice.shape, dtype=np.float32), (0, 1))
+
+            return data_array_slice, image
+
+        value_range = None
+        if plane_stats is not None:
+            value_range = (
+                plane_stats["min"], plane_stats["positive_min"], plane_stats["max"]
+            )
+
+        data_array_slice = self.axis_permutation.get_plane(
+            indices, dims, pyramid_level
         )
+        image = self.parent.data_array_image_view.render_slice(
+            data_array_slice, norm, gamma, value_range
+        )
+
+        return data_array_slice, image
+
+    # ------------------------------------------------------------------------------
+
+    def cache_plane(self, key: tuple, plane: tuple) -> None:
+        """
+        Adds a rendered plane to plane_cache.
+        """
+
+        data_array_slice, image = plane
+        self.plane_cache.put(key, plane, data_array_slice.nbytes + image[0].nbytes)
 
     # ------------------------------------------------------------------------------
     # Functions for dragging/dropping dimension controllers
@@ -133,6 +285,416 @@ class DataArrayController(QtGui.QWidget):
 
 # ----------------------------------------------------------------------------------
 
+class AxisPermutation:
+    """
+    Maps displayed axes (x, y, z, t) to the dimensions of a source DataArray.
+
+    Reordering only changes the mapping. Planes are cut from the untransposed 
+    source and put in display order afterwards, so lazily loaded arrays are 
+    only read for the displayed plane.
+    """
+
+    def __init__(self, data_array: xr.DataArray) -> None:
+        self.source_data_array = data_array
+        self.dims = tuple(data_array.dims)
+
+        # Block-averaged levels and per-plane statistics from iau_to_data_array
+        self.pyramid = self._get_pyramid(data_array)
+        self.stats = self._get_stats(data_array)
+
+        # Transposed view, created on first use after each reorder
+        self._view = data_array
+
+    # ------------------------------------------------------------------------------
+
+    def _get_pyramid(self, data_array: xr.DataArray) -> list:
+        """
+        Returns the pyramid levels in the encoding of data_array, or none if they
+        do not match it. Encodings are kept through isel and transpose, so the 
+        levels of a cropped or sliced array would show data outside of it.
+        """
+
+        pyramid = data_array.encoding.get("pyramid", [])
+
+        for k, level in enumerate(pyramid, start=1):
+            if set(level.dims) != set(data_array.dims):
+                return []
+
+            # Level k keeps every 2^k-th coordinate of its first two dimensions
+            for i, dim in enumerate(level.dims):
+                coords = data_array[dim].values
+                if i < 2:
+                    coords = coords[::2 ** k]
+                if not np.array_equal(level[dim].values, coords):
+                    return []
+
+        return list(pyramid)
+
+    # ------------------------------------------------------------------------------
+
+    def _get_stats(self, data_array: xr.DataArray) -> xr.Dataset:
+        """
+        Returns the per-plane statistics in the encoding of data_array, or None 
+        if they do not match it. Like pyramid levels, they are kept through 
+        isel, so the statistics of a sliced or cropped array describe other 
+        planes.
+        """
+
+        stats = data_array.encoding.get("stats")
+        if stats is None:
+            return None
+
+        # Statistics carry the coords of the whole file
+        file_dims = set(stats.dims) - {"bin", "bin_edge"}
+        if file_dims != set(data_array.dims):
+            return None
+
+        for dim in data_array.dims:
+            if not np.array_equal(stats[dim].values, data_array[dim].values):
+                return None
+
+        return stats
+
+    # ------------------------------------------------------------------------------
+
+    def set_order(self, dims: tuple) -> None:
+        """
+        Sets displayed dimension order.
+
+        Parameters:
+            dims (tuple): Dimension names of source DataArray in displayed order
+        """
+
+        if sorted(dims) != sorted(self.source_data_array.dims):
+            raise ValueError("dims must be a permutation of the DataArray dims.")
+
+        dims = tuple(dims)
+        if dims == self.dims:
+            return
+
+        self.dims = dims
+        self._view = None
+
+    # ------------------------------------------------------------------------------
+
+    def view(self) -> xr.DataArray:
+        """
+        Returns source DataArray with dimensions in displayed order. No data is 
+        read or copied.
+        """
+
+        if self._view is None:
+            self._view = self.source_data_array.transpose(*self.dims)
+
+        return self._view
+
+    # ------------------------------------------------------------------------------
+
+    def get_plane(
+        self, 
+        indices: list, 
+        dims: tuple = None, 
+        pyramid_level: int = 0
+    ) -> xr.DataArray:
+        """
+        Returns the displayed (x, y) plane at the given z/t indices.
+
+        Parameters:
+            indices (list): Index for each displayed dimension after x and y
+            dims (tuple): Displayed dimension order, defaults to current order
+            pyramid_level (int): Pyramid level to read from, 0 is the source
+
+        Returns:
+            data_array_slice (xr.DataArray): 2D DataArray in displayed order
+        """
+
+        if dims is None:
+            dims = self.dims
+
+        if pyramid_level == 0:
+            return get_plane(self.source_data_array, dims, indices)
+
+        return get_plane(self.pyramid[pyramid_level - 1], dims, indices)
+
+    # ------------------------------------------------------------------------------
+
+    def get_empty_plane(
+        self, 
+        indices: list, 
+        dims: tuple = None, 
+        pyramid_level: int = 0
+    ) -> xr.DataArray:
+        """
+        Returns a plane of zeros with the coords of get_plane, without reading 
+        data.
+        """
+
+        if dims is None:
+            dims = self.dims
+
+        source = self.source_data_array
+        if pyramid_level > 0:
+            source = self.pyramid[pyramid_level - 1]
+
+        plane = source.isel(dict(zip(dims[2:], indices))).transpose(*dims[:2])
+
+        return xr.DataArray(
+            np.zeros(plane.shape, dtype=plane.dtype), 
+            coords=plane.coords, 
+            dims=plane.dims, 
+            attrs=plane.attrs
+        )
+
+    # ------------------------------------------------------------------------------
+
+    def get_plane_stats(self, indices: list, dims: tuple = None) -> dict:
+        """
+        Returns statistics of the displayed plane stored at ingest, or None if
+        there are none. Statistics are over the first two dimensions of the file,
+        so they only apply when those are displayed as x and y.
+
+        Returns:
+            plane_stats (dict): "min", "max", "positive_min", "sum", "nonzero"
+        """
+
+        if dims is None:
+            dims = self.dims
+
+        if self.stats is None:
+            return None
+
+        stats_dims = self.stats["min"].dims
+        if set(dims[:2]) != set(self.source_data_array.dims) - set(stats_dims):
+            return None
+
+        index = dict(zip(dims[2:], indices))
+        stats_index = tuple(index[dim] for dim in stats_dims)
+
+        return {
+            name: self.stats[name].values[stats_index] 
+            for name in ["min", "max", "positive_min", "sum", "nonzero"]
+        }
+
+    # ------------------------------------------------------------------------------
+
+    def get_n_levels(self, dims: tuple = None) -> int:
+        """
+        Returns number of pyramid levels usable for the displayed order. Levels 
+        are averaged over their first two dimensions, so they only apply when 
+        those are displayed as x and y, and while both keep two points.
+        """
+
+        if dims is None:
+            dims = self.dims
+
+        if len(self.pyramid) == 0 or set(dims[:2]) != set(self.pyramid[0].dims[:2]):
+            return 0
+
+        n_levels = 0
+        for pyramid_level in self.pyramid:
+            if min(pyramid_level.shape[:2]) < 2:
+                break
+            n_levels += 1
+
+        return n_levels
+
+    # ------------------------------------------------------------------------------
+
+    def get_sizes(self, dims: tuple = None) -> tuple:
+        """
+        Returns sizes of the displayed dimensions after x and y.
+        """
+
+        if dims is None:
+            dims = self.dims
+
+        return tuple(self.source_data_array.sizes[dim] for dim in dims[2:])
+
+# ----------------------------------------------------------------------------------
+
+class UpdateScheduler(QtCore.QObject):
+    """
+    Coalesces update requests so that a function runs at most max_fps times per
+    second. 
+    
+    A request after an idle period runs immediately. Requests arriving within a
+    frame interval are merged into one run at the end of the interval, which 
+    renders only the latest state.
+    """
+
+    def __init__(self, function, max_fps: float = 30, parent=None) -> None:
+        super(UpdateScheduler, self).__init__(parent)
+
+        self.function = function
+        self.max_fps = max_fps
+        self.last_run = 0.0
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._run)
+
+    # ------------------------------------------------------------------------------
+
+    def set_max_fps(self, max_fps: float) -> None:
+        """
+        Sets maximum number of runs per second.
+        """
+
+        if max_fps <= 0:
+            raise ValueError("max_fps must be positive.")
+
+        self.max_fps = max_fps
+
+    # ------------------------------------------------------------------------------
+
+    def request(self, *args) -> None:
+        """
+        Requests a run. Signal arguments are ignored.
+        """
+
+        if self.timer.isActive():
+            return
+
+        wait = self.last_run + 1 / self.max_fps - time.perf_counter()
+
+        if wait <= 0:
+            self._run()
+        else:
+            self.timer.start(int(np.ceil(wait * 1000)))
+
+    # ------------------------------------------------------------------------------
+
+    def _run(self) -> None:
+        self.last_run = time.perf_counter()
+        self.function()
+
+# ----------------------------------------------------------------------------------
+
+class SlicePrefetcher(QtCore.QObject):
+    """
+    Reads and renders planes next to the displayed one on a worker thread.
+
+    While scrubbing, planes ahead in the direction of motion are prefetched. 
+    After a jump or an axis reorder, pending work is cancelled and both 
+    neighbours are prefetched. Finished planes are handed back to the GUI 
+    thread and added to the controller's plane_cache.
+    """
+
+    rendered = QtCore.pyqtSignal(object, object, int)
+
+    def __init__(
+        self, 
+        controller: DataArrayController, 
+        depth: int = 2, 
+        max_step: int = 4
+    ) -> None:
+        super(SlicePrefetcher, self).__init__(controller)
+
+        self.controller = controller
+        self.depth = depth
+        self.max_step = max_step
+
+        self.executor = futures.ThreadPoolExecutor(max_workers=1)
+        self.pending = {}
+
+        # Incremented on every jump, results from older generations are dropped
+        self.generation = 0
+        self.last_dims, self.last_indices = None, None
+
+        # Queued connection, since rendered is emitted from the worker thread
+        self.rendered.connect(self._store_plane)
+
+    # ------------------------------------------------------------------------------
+
+    def prefetch(self, indices: list) -> None:
+        """
+        Schedules planes around the displayed z/t indices.
+
+        Parameters:
+            indices (list): Displayed z/t indices
+        """
+
+        if len(indices) == 0:
+            return
+
+        dims = self.controller.axis_permutation.dims
+        sizes = self.controller.axis_permutation.get_sizes()
+
+        steps = None
+        if dims == self.last_dims:
+            delta = [i - j for i, j in zip(indices, self.last_indices)]
+            moved = [d for d in delta if d != 0]
+            if len(moved) == 1 and abs(moved[0]) <= self.max_step:
+                steps = [delta]
+
+        self.last_dims, self.last_indices = dims, list(indices)
+
+        if steps is None:
+            # Jump: direction unknown, so neighbours on both sides of z
+            self.cancel()
+            step = [1] + [0] * (len(indices) - 1)
+            steps = [step, [-s for s in step]]
+
+        targets = []
+        for step in steps:
+            for k in range(1, self.depth + 1):
+                target = [i + k * s for i, s in zip(indices, step)]
+                if all(0 <= i < size for i, size in zip(target, sizes)):
+                    targets.append(self.controller.get_plane_key(target))
+
+        # Cancels work that is no longer ahead of the displayed plane
+        for key in list(self.pending):
+            if key not in targets:
+                self.pending.pop(key).cancel()
+
+        for key in targets:
+            if key in self.pending or key in self.controller.plane_cache:
+                continue
+            future = self.executor.submit(self.controller.render_plane, key)
+            # Registered first, as the callback runs here if already done
+            self.pending[key] = future
+            future.add_done_callback(
+                lambda f, key=key, generation=self.generation: 
+                    self._emit_plane(f, key, generation)
+            )
+
+    # ------------------------------------------------------------------------------
+
+    def cancel(self) -> None:
+        """
+        Cancels pending work and drops results of work already running.
+        """
+
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.generation += 1
+
+    # ------------------------------------------------------------------------------
+
+    def _emit_plane(self, future, key: tuple, generation: int) -> None:
+        """
+        Runs on the worker thread when a plane is done.
+        """
+
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        self.rendered.emit(key, future.result(), generation)
+
+    # ------------------------------------------------------------------------------
+
+    def _store_plane(self, key: tuple, plane: tuple, generation: int) -> None:
+        """
+        Runs on the GUI thread and caches a finished plane.
+        """
+
+        if self.pending.get(key) is not None and generation == self.generation:
+            self.pending.pop(key)
+            self.controller.cache_plane(key, plane)
+
+# ----------------------------------------------------------------------------------
+
 class DimensionController(QtGui.QGroupBox):
     """
     Controls value of a particular dimension. Includes label, slider, and combobox.
@@ -1,5 +1,5 @@
 """
-Displays  of a DataArray
+Displays ROI statistics of a DataArray
 """
 
 # ----------------------------------------------------------------------------------
@@ -7,10 +7,11 @@ Displays  of a DataArray
 import numpy as np
 import pyqtgraph as pg
 from pyqtgraph import dockarea
-from PyQt5 import QtGui, QtCore
+from PyQt5 import QtGui
 import xarray as xr
 
-from iautil import io
+from iautil import analysis
+from iautil.analysis import STATISTICS, SummedAreaTable, roi_reduce
 from iautil.utilities.ui import DataArrayImageView, DataArrayPlot
 from iautil.plotting.image_tool.controller import DimensionController
 
@@ -21,12 +22,21 @@ class ROITab(QtGui.QWidget):
     
     """
 
-    def __init__(self, data_array: xr.DataArray, parent=None) -> None:
+    def __init__(
+        self, 
+        data_array: xr.DataArray, 
+        parent=None,
+        summed_area_table_size: int = 512 * 2 ** 20
+    ) -> None:
         super(ROITab, self).__init__(parent)
         
         self.parent = parent
         self.data_array = data_array
 
+        # Shared by all ROIs, rebuilt when the axis order changes
+        self.summed_area_table = None
+        self.summed_area_table_size = summed_area_table_size
+
         self.roi_widgets = [ROIWidget(self, data_array) for i in range(4)]
 
         self.tab_widget = QtGui.QTabWidget()
@@ -38,6 +48,44 @@ class ROITab(QtGui.QWidget):
         self.setLayout(self.layout)
         self.layout.addWidget(self.tab_widget)
 
+    # ------------------------------------------------------------------------------
+
+    def get_summed_area_table(self, data_array: xr.DataArray):
+        """
+        Returns summed-area table for the displayed axis order, building it on
+        first use.
+
+        Parameters:
+            data_array (xr.DataArray): DataArray in displayed axis order
+
+        Returns:
+            summed_area_table (SummedAreaTable): None if building the tables 
+                would take more than summed_area_table_size bytes
+        """
+
+        # Sum and sum of squares tables in float64, and the float64 copy of the
+        # data they are built from
+        if 3 * 8 * data_array.size > self.summed_area_table_size:
+            return None
+
+        if (
+            self.summed_area_table is None 
+            or self.summed_area_table.dims != data_array.dims
+        ):
+            self.summed_area_table = SummedAreaTable(data_array)
+
+        return self.summed_area_table
+
+    # ------------------------------------------------------------------------------
+
+    def release_summed_area_table(self) -> None:
+        """
+        Frees the summed-area table once no ROI is enabled.
+        """
+
+        if not any(roi_widget.controller.enabled for roi_widget in self.roi_widgets):
+            self.summed_area_table = None
+
 # ----------------------------------------------------------------------------------
 
 class ROIWidget(dockarea.DockArea):
@@ -55,7 +103,12 @@ class ROIWidget(dockarea.DockArea):
         self.roi = ROI(parent=self, image_view=self.main_image_view)
         self.roi.removeHandle(0)
         self.controller = ROIController(parent=self, data_array=self.data_array)
-        self.roi_image_view = ROIImageView(parent=self, data_array=self.data_array)
+
+        # Statistics over (z, t) are shown as an image, over z as a plot
+        if data_array.ndim == 4:
+            self.roi_image_view = ROIImageView(parent=self, data_array=self.data_array)
+        else:
+            self.roi_image_view = ROIPlot(parent=self, data_array=self.data_array)
 
         # Docks
         self.controller_dock = dockarea.Dock(
@@ -74,7 +127,21 @@ class ROIWidget(dockarea.DockArea):
         # Dock layout
         self.addDock(self.controller_dock)
         self.addDock(self.roi_image_view_dock, "bottom", self.controller_dock)
-        
+
+        self.main_controller.updated.connect(self.roi.get_data_array_region)
+
+    # ------------------------------------------------------------------------------
+
+    def set_values(self, values: xr.DataArray) -> None:
+        """
+        Displays ROI statistic for each plane.
+        """
+
+        if values.ndim == 0:
+            self.controller.value_lbl.setText(str(values.values))
+        else:
+            self.roi_image_view.set_data_array_slice(values, values)
+
 # ----------------------------------------------------------------------------------
 
 class ROI(pg.RectROI):
@@ -100,40 +167,72 @@ class ROI(pg.RectROI):
     # ------------------------------------------------------------------------------
 
     def get_data_array_region(self):
+        """
+        Computes selected statistic inside the ROI for every plane of the 
+        DataArray and displays the result.
+        """
+
+        if not self.parent.controller.enabled:
+            return
 
         data_array = self.image_view.data_array
-        data_array_slice = self.image_view.data_array_slice
+        x_slice, y_slice = self.get_index_bounds()
+        statistic = self.parent.controller.statistic
 
-        data, coords = self.getArrayRegion(
-            data=data_array_slice,
-            img=self.image_view.getImageItem(),
-            returnMappedCoords=True
-        )
-        print(coords[0][25][25])
+        # Sums, means, and stds come from the shared summed-area table if it fits
+        summed_area_table = None
+        if statistic != "max":
+            summed_area_table = self.parent.tab.get_summed_area_table(data_array)
+
+        if summed_area_table is not None:
+            self.values = summed_area_table.reduce(x_slice, y_slice, statistic)
+        else:
+            self.values = roi_reduce(data_array, x_slice, y_slice, statistic)
+
+        self.parent.set_values(self.values)
+
+    # ------------------------------------------------------------------------------
+
+    def get_index_bounds(self):
+        """
+        Maps ROI rectangle to index ranges of the displayed x and y dimensions.
+        Pixels partially inside the ROI are included, and the ranges always hold
+        at least one pixel.
 
-        x_coords, y_coords = coords
+        Returns:
+            x_slice (slice): x index range
+            y_slice (slice): y index range
+        """
+
+        data_array = self.image_view.data_array
+
+        # Axis starting positions and scaling of the image
+        pos, scale = self.image_view.get_axis_coords()
 
-        x_1 = x_coords[0][0]
-        x_2 = x_coords[-1][-1]
-        y_1 = y_coords[0][0]
-        y_2 = y_coords[-1][-1]
+        edges = [
+            [
+                (self.pos()[i] - pos[i]) / scale[i],
+                (self.pos()[i] + self.size()[i] - pos[i]) / scale[i]
+            ]
+            for i in range(2)
+        ]
 
-        h = self.image_view.getImageItem().mapFromData(QtCore.QPoint(0,0)) 
+        return analysis.get_index_bounds(data_array.shape, *edges)
 
-        pg.ImageItem.mapFromData
-        print(h)
-        avgs = []
-        '''for i in range(data_array.shape[2]):
-            for j in range(data_array.shape[3]):
-                avg = data_array[x_1:x_2, y_1:y_2, i, j].shape
-                #print(avg)'''
+    # ------------------------------------------------------------------------------
 
-        #data_array_slice = data_array[x_1:x_2,y_1:y_2]
+    def get_definition(self) -> dict:
+        """
+        Returns ROI definition for analysis.apply_roi.
+        """
 
-        '''self.parent.roi_image_view.set_data_array_slice(
-            data_array,
-            data_array_slice
-        )'''
+        return {
+            "type": "rect",
+            "dims": list(self.image_view.data_array.dims),
+            "x": [self.pos()[0], self.pos()[0] + self.size()[0]],
+            "y": [self.pos()[1], self.pos()[1] + self.size()[1]],
+            "statistic": self.parent.controller.statistic
+        }
 
     # ------------------------------------------------------------------------------
 
@@ -173,6 +272,13 @@ class ROIController(QtGui.QWidget):
         self.dim_2_center_cbx = QtGui.QComboBox()
         self.enable_chkbx = QtGui.QCheckBox("Enable")
         self.center_btn = QtGui.QPushButton("Center ROI")
+        self.save_btn = QtGui.QPushButton("Save ROI")
+        self.statistic_lbl = QtGui.QLabel("Statistic")
+        self.statistic_cbx = QtGui.QComboBox()
+        self.statistic_cbx.addItems([i.capitalize() for i in STATISTICS])
+        self.value_lbl = QtGui.QLabel()
+
+        self.enabled = False
 
         self.layout = QtGui.QGridLayout()
         self.setLayout(self.layout)
@@ -186,13 +292,44 @@ class ROIController(QtGui.QWidget):
         self.layout.addWidget(self.dim_2_center_cbx, 2, 2)
         self.layout.addWidget(self.enable_chkbx, 3, 0)
         self.layout.addWidget(self.center_btn, 3, 1)
+        self.layout.addWidget(self.save_btn, 3, 2)
+        self.layout.addWidget(self.statistic_lbl, 4, 0)
+        self.layout.addWidget(self.statistic_cbx, 4, 1)
+        self.layout.addWidget(self.value_lbl, 4, 2)
         self.layout.setRowStretch(0, 1)
         self.layout.setRowStretch(1, 2)
         self.layout.setRowStretch(2, 2)
         self.layout.setRowStretch(3, 2)
+        self.layout.setRowStretch(4, 2)
 
         self.enable_chkbx.stateChanged.connect(self.toggle_enabled)
         self.center_btn.clicked.connect(self.parent.roi.center)
+        self.save_btn.clicked.connect(self.save)
+        self.statistic_cbx.currentIndexChanged.connect(
+            self.parent.roi.get_data_array_region
+        )
+
+    # ------------------------------------------------------------------------------
+
+    @property
+    def statistic(self) -> str:
+        """
+        Statistic selected in combobox.
+        """
+
+        return self.statistic_cbx.currentText().lower()
+
+    # ------------------------------------------------------------------------------
+
+    def save(self):
+        """
+        Saves ROI definition to a JSON file for analysis.batch_apply_roi.
+        """
+
+        path = QtGui.QFileDialog.getSaveFileName(self, "", "", "(*.json)")[0]
+
+        if path != "":
+            analysis.save_roi(self.parent.roi.get_definition(), path)
 
     # ------------------------------------------------------------------------------
 
@@ -217,6 +354,8 @@ class ROIController(QtGui.QWidget):
 
         self.parent.roi_image_view.clear()
         self.parent.roi.hide()
+        self.value_lbl.clear()
+        self.parent.tab.release_summed_area_table()
 
 # ----------------------------------------------------------------------------------
 
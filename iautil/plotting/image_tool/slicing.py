@@ -11,8 +11,11 @@ from PyQt5 import QtGui, QtCore
 import xarray as xr
 
 from iautil import io
+from iautil.analysis import line_profile
 from iautil.utilities.ui import DataArrayImageView, DataArrayPlot
-from iautil.plotting.image_tool.controller import DimensionController
+from iautil.plotting.image_tool.controller import (
+    DimensionController, UpdateScheduler
+)
 
 # ----------------------------------------------------------------------------------
 
@@ -27,6 +30,9 @@ class SlicingTab(QtGui.QWidget):
         self.parent = parent
         self.data_array = data_array
 
+        # Recomputes slices when ROIs, sliders, or the main DataArray change
+        self.pipeline = SlicingPipeline(self)
+
         # List of SlicingWidget objects housed in tab
         self.slicing_widgets = [
             SlicingWidget(i, self, data_array) for i in range(data_array.ndim, 1, -1)
@@ -58,6 +64,9 @@ class SlicingTab(QtGui.QWidget):
             self.layout.addWidget(self.slicing_widgets[i])
             self.layout.setRowStretch(i, 1)
 
+        self.pipeline.set_levels(self.slicing_widgets)
+        self.parent.data_array_controller.updated.connect(self.pipeline.invalidate)
+
 # ----------------------------------------------------------------------------------
 
 class SlicingWidget(dockarea.DockArea):
@@ -130,9 +139,13 @@ class SlicingWidget(dockarea.DockArea):
             self.main_controller.updated.connect(
                 lambda: self.slider.set_dimension(3)
             )
-            self.slider.updated.connect(
-                self.roi.slice_data_array
+            # Coalesces slider updates like the main DataArrayController
+            self.slider_scheduler = UpdateScheduler(
+                self.tab.pipeline.update, 
+                self.main_controller.update_scheduler.max_fps,
+                parent=self
             )
+            self.slider.updated.connect(self.slider_scheduler.request)
         
     # ------------------------------------------------------------------------------
 
@@ -148,7 +161,6 @@ class SlicingWidget(dockarea.DockArea):
             self.roi.parent_imv = parent.image_view
 
         self.roi.parent_imv.addItem(self.roi)
-        self.roi.sigRegionChanged.connect(self.roi.slice_data_array)
 
     # ------------------------------------------------------------------------------
 
@@ -159,7 +171,6 @@ class SlicingWidget(dockarea.DockArea):
         self.child = child
 
         self.roi.child_roi = child.roi
-        self.roi.sigRegionChanged.connect(self.roi.child_roi.slice_data_array)
 
     # ------------------------------------------------------------------------------
 
@@ -189,6 +200,9 @@ class SlicingWidget(dockarea.DockArea):
         if self.child is not None:
             self.child.controller.setEnabled(True)
 
+        # Centering may leave the ROI where it was before disabling
+        self.tab.pipeline.update()
+
     # ------------------------------------------------------------------------------
 
     def disable(self):
@@ -200,6 +214,7 @@ class SlicingWidget(dockarea.DockArea):
         self.image_view.clear()
         self.image_view.setEnabled(False)
         self.roi.hide()
+        self.tab.pipeline.reset(self)
         self.controller.roi_controller.setEnabled(False)
         
         if self.child is not None:
@@ -224,7 +239,134 @@ class SlicingWidget(dockarea.DockArea):
             if export_dialog.format == ".csv":
                 io.create_csv(data, coords, labels, export_dialog.path)
             if export_dialog.format == ".nc":
-                io.create_netcdf(data, coords, labels, export_dialog.path)
+                io.data_array_to_netcdf(
+                    self.image_view.data_array, export_dialog.path
+                )
+            if export_dialog.format == ".zarr":
+                io.data_array_to_zarr(
+                    self.image_view.data_array, export_dialog.path
+                )
+
+# ----------------------------------------------------------------------------------
+
+class SlicingPipeline(QtCore.QObject):
+    """
+    Tracks dependencies between the levels of a SlicingTab. Each level keeps its
+    slice and is only recomputed when the output of its parent level or its own 
+    ROI changed. Updates run top-down, so one interaction recomputes every dirty
+    level exactly once.
+    """
+
+    def __init__(self, parent=None) -> None:
+        super(SlicingPipeline, self).__init__(parent)
+
+        self.slicing_widgets = []
+
+        # Incremented when the main DataArray changes (axis order)
+        self.source_version = 0
+
+        self.reset_counts()
+
+    # ------------------------------------------------------------------------------
+
+    def set_levels(self, slicing_widgets: list) -> None:
+        """
+        Sets SlicingWidgets in parent-to-child order and connects their ROIs.
+        """
+
+        self.slicing_widgets = slicing_widgets
+
+        # Per level: input state, cached slice, output version, displayed state
+        self.states = [None] * len(slicing_widgets)
+        self.slices = [None] * len(slicing_widgets)
+        self.versions = [0] * len(slicing_widgets)
+        self.displayed = [None] * len(slicing_widgets)
+
+        self.reset_counts()
+
+        for slicing_widget in slicing_widgets:
+            slicing_widget.roi.sigRegionChanged.connect(self.update)
+
+    # ------------------------------------------------------------------------------
+
+    def reset_counts(self) -> None:
+        """
+        Resets recomputation counters.
+        """
+
+        n = len(self.slicing_widgets)
+        self.compute_counts = [0] * n
+        self.display_counts = [0] * n
+        self.skip_counts = [0] * n
+
+        # Levels recomputed by the latest update
+        self.last_computed = []
+
+    # ------------------------------------------------------------------------------
+
+    def reset(self, slicing_widget) -> None:
+        """
+        Forgets the slices of a level and its children, whose ImageViews were 
+        cleared, so they are recomputed and redisplayed when enabled again.
+        """
+
+        if slicing_widget not in self.slicing_widgets:
+            return
+
+        i = self.slicing_widgets.index(slicing_widget)
+        self.states[i:] = [None] * (len(self.states) - i)
+        self.slices[i:] = [None] * (len(self.slices) - i)
+        self.displayed[i:] = [None] * (len(self.displayed) - i)
+
+    # ------------------------------------------------------------------------------
+
+    def invalidate(self) -> None:
+        """
+        Marks every level as dirty and updates.
+        """
+
+        self.source_version += 1
+        self.update()
+
+    # ------------------------------------------------------------------------------
+
+    def update(self, *args) -> None:
+        """
+        Recomputes and redisplays dirty levels. Signal arguments are ignored.
+        """
+
+        self.last_computed = []
+        parent_version = self.source_version
+
+        for i, slicing_widget in enumerate(self.slicing_widgets):
+            # Children of a disabled level are disabled as well
+            if not slicing_widget.enabled:
+                self.reset(slicing_widget)
+                break
+
+            roi = slicing_widget.roi
+            state = (parent_version,) + roi.get_state()
+
+            if state != self.states[i]:
+                self.slices[i] = roi.compute_slice()
+                self.states[i] = state
+                self.versions[i] += 1
+                self.compute_counts[i] += 1
+                self.last_computed.append(i)
+            else:
+                self.skip_counts[i] += 1
+
+            # 4D slices also depend on the slider
+            displayed = (self.versions[i],)
+            if hasattr(slicing_widget, "slider"):
+                displayed += (slicing_widget.slider.value_slider.value(),)
+
+            if displayed != self.displayed[i]:
+                roi.display_slice(self.slices[i])
+                self.displayed[i] = displayed
+                self.display_counts[i] += 1
+
+            parent_version = self.versions[i]
 
 # ----------------------------------------------------------------------------------
 
@@ -237,7 +379,7 @@ class SlicingExportDialog(QtGui.QDialog):
 
         self.format_lbl = QtGui.QLabel("Format:")
         self.format_cbx = QtGui.QComboBox()
-        self.format_cbx.addItems([".csv", ".nc"])
+        self.format_cbx.addItems([".csv", ".nc", ".zarr"])
         self.dialog_btnbox = QtGui.QDialogButtonBox()
         self.dialog_btnbox.addButton("OK", QtGui.QDialogButtonBox.AcceptRole)
 
@@ -275,61 +417,116 @@ class SlicingROI(pg.LineSegmentROI):
         self.parent_imv, self.child_imv = None, None
         self.parent_roi, self.child_roi = None, None
         self.slicing_widget = None
+
+        # Line cut sampling, in parent image pixels
+        self.line_width = 1
+        self.sample_density = 1
         
     # ------------------------------------------------------------------------------
 
-    def slice_data_array(self):
+    def compute_slice(self) -> xr.DataArray:
         """
-        Creates new DataArray from slice coordinates and displays in ImageView
+        Creates new DataArray from slice coordinates.
+
+        Returns:
+            c_data_array (xr.DataArray): Line cut through parent DataArray
         """
-        if self.slicing_widget.enabled:
-            # DataArray and slice from parent ImageView
-            p_data_array = self.parent_imv.data_array
-            p_data_array_slice = self.parent_imv.data_array_slice
 
-            # Slicing coords
-            data, coords = self.getArrayRegion(
-                data=p_data_array_slice,
-                img=self.parent_imv.getImageItem(),
-                returnMappedCoords=True
-            )
-            x_coords, y_coords = coords.astype(int)
-
-            # For coordinate indicies outside those of image
-            for i in range(len(x_coords)):
-                if x_coords[i] < 0:
-                    x_coords[i] = 0
-                if x_coords[i] >= p_data_array.values.shape[0]:
-                    x_coords[i] = p_data_array.values.shape[0] - 1
-            for i in range(len(y_coords)):
-                if y_coords[i] < 0:
-                    y_coords[i] = 0
-                if y_coords[i] >= p_data_array.values.shape[1]:
-                    y_coords[i] = p_data_array.values.shape[1] - 1
-            self.coords = x_coords, y_coords
-
-            # Creates child data array from coords
-            c_data_array = xr.concat(
-                [p_data_array[x, y] for x, y in zip(x_coords, y_coords)],
-                f"{p_data_array.dims[0]}, {p_data_array.dims[1]}"
-            )
+        # DataArray from parent ImageView
+        p_data_array = self.parent_imv.data_array
 
-            # Takes slice
-            if c_data_array.ndim == 3:
-                # 3D slice based off slider value
-                c_data_array_slice = c_data_array[
-                    :, :, self.slicing_widget.slider.value_slider.value()
-                ]
-            else:
-                c_data_array_slice = c_data_array
+        # Endpoints in parent DataArray index space
+        start, end = self.get_endpoint_indices()
+        length = np.hypot(end[0] - start[0], end[1] - start[1])
+
+        # Creates child data array from interpolated samples along the ROI.
+        # Zero-length segments (e.g. while centering) still give two samples, 
+        # since ImageViews need two points per axis.
+        c_data_array, self.coords = line_profile(
+            p_data_array,
+            start,
+            end,
+            n_samples=max(2, int(np.ceil(length * self.sample_density)) + 1),
+            width=self.line_width
+        )
+
+        return c_data_array
+
+    # ------------------------------------------------------------------------------
+
+    def display_slice(self, c_data_array: xr.DataArray) -> None:
+        """
+        Displays DataArray from compute_slice in child ImageView.
+        """
+
+        # Takes slice
+        if c_data_array.ndim == 3:
+            # 3D slice based off slider value
+            c_data_array_slice = c_data_array[
+                :, :, self.slicing_widget.slider.value_slider.value()
+            ]
+        else:
+            c_data_array_slice = c_data_array
+
+        self.child_imv.set_data_array_slice(
+            c_data_array,
+            c_data_array_slice
+        )  
+
+        # Updates ROIController
+        self.slicing_widget.controller.roi_controller.update_controller()
+
+    # ------------------------------------------------------------------------------
+
+    def get_state(self) -> tuple:
+        """
+        Returns endpoints and sampling options that determine the slice.
+        """
+
+        return (
+            tuple(tuple(endpoint) for endpoint in self.get_endpoint_indices()),
+            self.line_width,
+            self.sample_density
+        )
+
+    # ------------------------------------------------------------------------------
+
+    def get_endpoint_indices(self):
+        """
+        Maps ROI endpoints to (fractional) indices of the parent DataArray.
+
+        Returns:
+            start (tuple): x and y index of first endpoint
+            end (tuple): x and y index of second endpoint
+        """
+
+        # Axis starting positions and scaling of the parent image
+        pos, scale = self.parent_imv.get_axis_coords()
 
-            self.child_imv.set_data_array_slice(
-                c_data_array,
-                c_data_array_slice
-            )  
+        endpoints = []
+        for point in self.listPoints():
+            point = self.mapToParent(point)
+            endpoints.append((
+                (point.x() - pos[0]) / scale[0], 
+                (point.y() - pos[1]) / scale[1]
+            ))
 
-            # Updates ROIController
-            self.slicing_widget.controller.roi_controller.update_controller()
+        return endpoints
+
+    # ------------------------------------------------------------------------------
+
+    def set_sampling(self, line_width: float = None, sample_density: float = None):
+        """
+        Sets line width and samples per pixel, then retakes slice.
+        """
+
+        if line_width is not None:
+            self.line_width = line_width
+        if sample_density is not None:
+            self.sample_density = sample_density
+
+        # Updates this slice and the child slice
+        self.sigRegionChanged.emit(self)
 
     # ------------------------------------------------------------------------------
 
@@ -371,6 +568,14 @@ class SlicingController(QtGui.QWidget):
         self.enable_chkbx = QtGui.QCheckBox("Enable")
         self.center_btn = QtGui.QPushButton("Center")
         self.export_btn = QtGui.QPushButton("Export")
+        self.width_lbl = QtGui.QLabel("Line Width")
+        self.width_sbx = QtGui.QDoubleSpinBox()
+        self.width_sbx.setRange(1, 1000)
+        self.density_lbl = QtGui.QLabel("Samples/Pixel")
+        self.density_sbx = QtGui.QDoubleSpinBox()
+        self.density_sbx.setRange(0.1, 10)
+        self.density_sbx.setSingleStep(0.5)
+        self.density_sbx.setValue(1)
 
         self.layout = QtGui.QGridLayout()
         self.setLayout(self.layout)
@@ -380,11 +585,25 @@ class SlicingController(QtGui.QWidget):
         self.layout.addWidget(self.enable_chkbx, 1, 0)
         self.layout.addWidget(self.center_btn, 1, 1)
         #self.layout.addWidget(self.export_btn, 1, 2)
+        self.layout.addWidget(self.width_lbl, 2, 0)
+        self.layout.addWidget(self.width_sbx, 2, 1)
+        self.layout.addWidget(self.density_lbl, 3, 0)
+        self.layout.addWidget(self.density_sbx, 3, 1)
         self.layout.setColumnStretch(0, 1)
         self.layout.setColumnStretch(1, 1)
         self.layout.setColumnStretch(2, 1)
         self.layout.setRowStretch(0, 6)
         self.layout.setRowStretch(1, 1)
+        self.layout.setRowStretch(2, 1)
+        self.layout.setRowStretch(3, 1)
+
+        roi = self.slicing_widget.roi
+        self.width_sbx.valueChanged.connect(
+            lambda value: roi.set_sampling(line_width=value)
+        )
+        self.density_sbx.valueChanged.connect(
+            lambda value: roi.set_sampling(sample_density=value)
+        )
 
 # ----------------------------------------------------------------------------------
 
@@ -410,7 +629,6 @@ class SlicingROIController(QtGui.QWidget):
             self.layout.addWidget(self.dim_ctrls[i], i, 0)
 
         self.main_controller.updated.connect(self.set_dimension_order)
-        self.roi.sigRegionChanged.connect(self.update_controller)
 
         self.updating = None
 
@@ -424,8 +642,11 @@ class SlicingROIController(QtGui.QWidget):
         """
         self.data_array = self.main_controller.data_array
         
+        # Refilling comboboxes should not move the ROI
+        self.updating = "Controller"
         for i in range(self.data_array.ndim):
             self.dim_ctrls[i].set_dimension(i)
+        self.updating = None
 
         self.update_controller()    
 
@@ -639,4 +860,4 @@ class SlicingROIDimensionController(QtGui.QWidget):
 
             self.used_coords = [dim_coords[i] for i in indices]
 
-# ----------------------------------------------------------------------------------
\ No newline at end of file
+# ----------------------------------------------------------------------------------
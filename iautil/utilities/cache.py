@@ -0,0 +1,101 @@
+"""
+Size-bounded caches.
+"""
+
+# ----------------------------------------------------------------------------------
+
+from collections import OrderedDict
+
+# ----------------------------------------------------------------------------------
+
+__all__ = (
+    "LRUCache",
+)
+
+# ----------------------------------------------------------------------------------
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by the total byte size of its values.
+    Counts hits and misses.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2 ** 20) -> None:
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative.")
+
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        # key -> (value, nbytes), least recently used first
+        self._items = OrderedDict()
+
+    # ------------------------------------------------------------------------------
+
+    def get(self, key, default=None):
+        """
+        Returns value for key and marks it as most recently used.
+
+        Parameters:
+            key: Hashable key
+            default: Value returned on a miss
+
+        Returns:
+            value: Cached value or default
+        """
+
+        if key not in self._items:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._items.move_to_end(key)
+
+        return self._items[key][0]
+
+    # ------------------------------------------------------------------------------
+
+    def put(self, key, value, nbytes: int) -> None:
+        """
+        Adds value to cache, evicting least recently used values until it fits.
+        Values larger than max_bytes are not cached.
+
+        Parameters:
+            key: Hashable key
+            value: Value to cache
+            nbytes (int): Size of value in bytes
+        """
+
+        if key in self._items:
+            self.nbytes -= self._items.pop(key)[1]
+
+        if nbytes > self.max_bytes:
+            return
+
+        while self.nbytes + nbytes > self.max_bytes:
+            self.nbytes -= self._items.popitem(last=False)[1][1]
+
+        self._items[key] = (value, nbytes)
+        self.nbytes += nbytes
+
+    # ------------------------------------------------------------------------------
+
+    def clear(self) -> None:
+        """
+        Removes all values. Hit and miss counts are kept.
+        """
+
+        self._items.clear()
+        self.nbytes = 0
+
+    # ------------------------------------------------------------------------------
+
+    def __contains__(self, key) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+# ----------------------------------------------------------------------------------
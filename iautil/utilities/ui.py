@@ -4,8 +4,6 @@ Contains overridden UI widget classes from PyQtGraph.
 
 # ----------------------------------------------------------------------------------
 
-from matplotlib import colors
-from matplotlib import pyplot as plt
 import numpy as np
 import pyqtgraph as pg
 from pyqtgraph import QtGui, QtCore
@@ -38,78 +36,250 @@ class DataArrayImageView(pg.ImageView):
 
         self.data_array = None
         self.data_array_slice = None
-        self.image_item = None
+        self.image_item = self.getImageItem()
         self.axis_order = None
 
+        # Dims, shape, position, and scale of the displayed image
+        self.image_layout = None
+
+        # Normalization applied to each slice before the colormap lookup table
+        self.norm = "log"
+        self.gamma = 0.5
+
         # Removes out default ImageView features
         self.ui.histogram.hide()
         self.ui.roiBtn.hide()
         self.ui.menuBtn.hide()
 
+        # The hidden histogram would otherwise be recomputed on every update
+        self.image_item.sigImageChanged.disconnect(self.ui.histogram.imageChanged)
+
         # Aspect/range settings
         self.view.setAspectLocked(lock=False)
         self.view.enableAutoRange()
 
+        self.set_color_map("jet")
+
     # ------------------------------------------------------------------------------
 
     def set_data_array_slice(
         self, 
         data_array: xr.DataArray, 
-        data_array_slice: xr.DataArray
+        data_array_slice: xr.DataArray,
+        image: tuple = None
     ) -> None:
         """
         Sets image, axis labels, axis coordinates for ImageView.
 
         Parameters:
             data_array (xr.DataArray): 2D DataArray with data, coords, and dims
+            image (tuple): Output of render_slice for data_array_slice, if 
+                already computed
         """
 
         self.data_array = data_array
 
-        # Adds matplotlib colormap to image
-        self.data_array_slice = self._set_color_map(data_array_slice.values)
-        self.image_item = pg.ImageItem(self.data_array_slice)
+        # Normalizes image, colormap is applied by the ImageItem lookup table
+        if image is None:
+            image = self.render_slice(data_array_slice)
+        self.data_array_slice, levels = image
 
         if self.isEnabled():
+            # Retrieves axis starting positions and scaling
+            pos, scale = self._get_axis_coords(data_array_slice)
+            image_layout = (
+                data_array_slice.dims, self.data_array_slice.shape, pos, scale
+            )
+
+            if self.image is not None and image_layout == self.image_layout:
+                # Same axes as the displayed image, so only pixel data changes.
+                # imageDisp caches the processed previous image in ImageView.
+                self.image = self.data_array_slice
+                self.imageDisp = None
+                self.image_item.setImage(
+                    self.data_array_slice, 
+                    autoLevels=False, 
+                    levels=levels
+                )
+                return
+
+            # Keeps the view range when only the resolution changed
+            auto_range = (
+                self.image_layout is None or image_layout[0] != self.image_layout[0]
+            )
+            self.image_layout = image_layout
+
             # Sets plot labels
             self.view.setLabels(
                 bottom = data_array_slice.dims[0],
                 left = data_array_slice.dims[1]
             )
 
-            # Retrieves axis starting positions and scaling
-            pos, scale = self._get_axis_coords(data_array_slice)
-
             # Adds image to ImageView with proper axes
-            self.setImage(self.data_array_slice, pos=pos, scale=scale)
+            self.setImage(
+                self.data_array_slice, 
+                pos=pos, 
+                scale=scale, 
+                levels=levels, 
+                autoLevels=False,
+                autoRange=auto_range
+            )
 
     # ------------------------------------------------------------------------------
 
-    def _set_color_map(self, image: np.ndarray) -> np.ndarray:
+    def get_axis_coords(self, data_array: xr.DataArray = None):
         """
-        Adds colormap to an image. Currently only supports matplotlib "jet" in
-        logarithmic scale.
+        Retrieves axis starting points and scaling of the full DataArray, which
+        can differ from those of a displayed pyramid level.
 
         Parameters:
-            image (np.ndarray): NumPy array to map
+            data_array (xr.DataArray): DataArray to use instead of the displayed 
+                one
 
         Returns:
-            color_image (np.ndarray): NumPy array with color mapping
+            pos (tuple): starting x and y points
+            scale (tuple): space between x and y points
         """
 
-        # Max pixel value in image
-        image_max = np.amax(image)
+        if data_array is None:
+            data_array = self.data_array
 
-        # Normalizer
-        norm = colors.LogNorm(vmax=image_max)
+        return self._get_axis_coords(data_array)
 
-        # Normalized image
-        normalized_image = norm(image)
+    # ------------------------------------------------------------------------------
+
+    def set_color_map(self, color_map) -> None:
+        """
+        Sets the colormap lookup table used to color images.
+
+        Parameters:
+            color_map (str or pg.ColorMap): matplotlib colormap name or ColorMap
+        """
+
+        if isinstance(color_map, str):
+            color_map = pg.colormap.getFromMatplotlib(color_map)
+
+        self.color_map = color_map
+        self.setColorMap(color_map)
+
+    # ------------------------------------------------------------------------------
+
+    def set_norm(self, norm: str, gamma: float = None) -> None:
+        """
+        Sets the normalization applied to images before the colormap.
+
+        Parameters:
+            norm (str): "linear", "log", or "power"
+            gamma (float): Exponent for "power" normalization
+        """
 
-        # Normalized image with colormap
-        color_image = plt.cm.jet(normalized_image)
+        if norm not in ["linear", "log", "power"]:
+            raise ValueError("norm must be 'linear', 'log', or 'power'.")
 
-        return color_image
+        self.norm = norm
+        if gamma is not None:
+            self.gamma = gamma
+
+    # ------------------------------------------------------------------------------
+
+    def render_slice(
+        self, 
+        data_array_slice: xr.DataArray,
+        norm: str = None,
+        gamma: float = None,
+        value_range: tuple = None
+    ) -> tuple:
+        """
+        Normalizes a 2D slice. Does not modify the widget, so it is safe to call
+        from a worker thread.
+
+        Parameters:
+            data_array_slice (xr.DataArray): 2D DataArray to render
+            norm (str): Normalization, defaults to current setting
+            gamma (float): Exponent for "power" normalization, defaults to 
+                current setting
+            value_range (tuple): Known minimum, smallest positive value, and 
+                maximum of the slice, which skips scanning it for levels
+
+        Returns:
+            image (tuple): Normalized image and its levels
+        """
+
+        if norm is None:
+            norm = self.norm
+        if gamma is None:
+            gamma = self.gamma
+
+        return self._normalize(data_array_slice.values, norm, gamma, value_range)
+
+    # ------------------------------------------------------------------------------
+
+    def _normalize(
+        self, 
+        image: np.ndarray, 
+        norm: str, 
+        gamma: float, 
+        value_range: tuple = None
+    ):
+        """
+        Scales an image for the colormap lookup table. Log and power scaling are
+        computed in place on a float32 copy, linear images are passed through.
+
+        Parameters:
+            image (np.ndarray): NumPy array to normalize
+            norm (str): "linear", "log", or "power"
+            gamma (float): Exponent for "power" normalization
+            value_range (tuple): Minimum, smallest positive value, and maximum of 
+                image, computed here if not given
+
+        Returns:
+            normalized_image (np.ndarray): NumPy array to display
+            levels (tuple): Values mapped to the ends of the lookup table
+        """
+
+        if norm == "linear":
+            normalized_image = np.ascontiguousarray(image)
+            if value_range is None:
+                levels = (np.amin(normalized_image), np.amax(normalized_image))
+            else:
+                levels = (value_range[0], value_range[2])
+
+        else:
+            # One pass over the (possibly strided) slice into a contiguous copy
+            normalized_image = np.array(image, dtype=np.float32)
+            if value_range is None:
+                vmax = np.amax(normalized_image)
+            else:
+                vmax = value_range[2]
+
+            if norm == "log":
+                if vmax <= 0:
+                    return np.zeros(image.shape, dtype=np.float32), (0, 1)
+
+                # Non-positive values take the lowest color
+                if value_range is None:
+                    vmin = np.amin(
+                        normalized_image, where=normalized_image > 0, initial=vmax
+                    )
+                else:
+                    vmin = value_range[1]
+                np.maximum(normalized_image, vmin, out=normalized_image)
+                np.log10(normalized_image, out=normalized_image)
+                levels = (np.log10(vmin), np.log10(vmax))
+
+            else:
+                if value_range is None:
+                    vmin = np.amin(normalized_image)
+                else:
+                    vmin = value_range[0]
+                np.subtract(normalized_image, vmin, out=normalized_image)
+                np.power(normalized_image, gamma, out=normalized_image)
+                levels = (0, (vmax - vmin) ** gamma)
+
+        if levels[1] <= levels[0]:
+            levels = (levels[0], levels[0] + 1)
+
+        return normalized_image, levels
 
     # ------------------------------------------------------------------------------
 
@@ -28,6 +28,9 @@ setup(
         "vtk",
         "xarray",
     ],
+    extras_require={
+        "export": ["h5netcdf", "zarr"],
+    },
     packages=find_packages(),
     license="See LICENSE file",
     platforms="any",
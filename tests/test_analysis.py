@@ -0,0 +1,146 @@
+"""
+Tests for analysis.py
+"""
+
+# ----------------------------------------------------------------------------------
+
+import numpy as np
+import os
+from scipy import ndimage
+import shutil
+import tempfile
+import unittest
+import xarray as xr
+
+from iautil import analysis, io
+
+# ----------------------------------------------------------------------------------
+
+class TestAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        shape = (20, 25, 3, 2)
+        dims = ["H", "K", "L", "t"]
+        self.data_array = xr.DataArray(
+            np.random.default_rng(0).random(shape),
+            coords={d: np.arange(n) * 0.5 - 1 for d, n in zip(dims, shape)},
+            dims=dims
+        )
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_get_plane(self):
+        plane = analysis.get_plane(self.data_array, ("K", "L", "H", "t"), [3, 1])
+
+        self.assertEqual(plane.dims, ("K", "L"))
+        np.testing.assert_array_equal(
+            plane.values, self.data_array.values[3, :, :, 1]
+        )
+
+    def test_line_profile_matches_map_coordinates(self):
+        profile, indices = analysis.line_profile(
+            self.data_array, (1.3, 2.7), (15.2, 20.1), n_samples=50
+        )
+        t = np.linspace(0, 1, 50)
+        x, y = 1.3 + t * 13.9, 2.7 + t * 17.4
+
+        self.assertEqual(profile.dims, ("H, K", "L", "t"))
+        for i in range(3):
+            for j in range(2):
+                expected = ndimage.map_coordinates(
+                    self.data_array.values[:, :, i, j], [x, y], order=1
+                )
+                np.testing.assert_allclose(profile.values[:, i, j], expected)
+        np.testing.assert_array_equal(indices[0], np.rint(x).astype(int))
+
+    def test_line_profile_width_averages_parallel_lines(self):
+        profile, _ = analysis.line_profile(
+            self.data_array, (2, 5), (2, 15), n_samples=11, width=3
+        )
+        expected = self.data_array.values[1:4, 5:16].mean(axis=0)
+
+        np.testing.assert_allclose(profile.values, expected)
+
+    def test_roi_reduce_invalid_statistic(self):
+        with self.assertRaises(ValueError) as context:
+            analysis.roi_reduce(self.data_array, slice(0, 2), slice(0, 2), "median")
+        self.assertEqual(
+            str(context.exception), 
+            "statistic must be 'mean', 'sum', 'max', or 'std'."
+        )
+
+    def test_summed_area_table_matches_roi_reduce(self):
+        table = analysis.SummedAreaTable(self.data_array)
+        x_slice, y_slice = analysis.get_index_bounds(
+            self.data_array.shape, (3.5, 10.2), (12, 4)
+        )
+
+        self.assertEqual((x_slice, y_slice), (slice(3, 11), slice(4, 12)))
+        for statistic in ["mean", "sum", "std"]:
+            xr.testing.assert_allclose(
+                table.reduce(x_slice, y_slice, statistic),
+                analysis.roi_reduce(self.data_array, x_slice, y_slice, statistic)
+            )
+
+    def test_summed_area_table_std_with_offset(self):
+        # A large offset cancels in sum(x^2) / n - mean^2
+        rng = np.random.default_rng(0)
+        data_array = xr.DataArray(
+            1e6 + rng.random((200, 200, 2)), 
+            dims=["H", "K", "L"]
+        )
+        x_slice, y_slice = slice(50, 150), slice(20, 120)
+
+        xr.testing.assert_allclose(
+            analysis.SummedAreaTable(data_array).reduce(x_slice, y_slice, "std"),
+            analysis.roi_reduce(data_array, x_slice, y_slice, "std"),
+            rtol=1e-6
+        )
+
+    def test_apply_roi_rect_uses_coords_and_dims(self):
+        roi = {
+            "type": "rect", 
+            "dims": ["K", "H", "L", "t"], 
+            "x": [0, 2], 
+            "y": [-1, 0.4], 
+            "statistic": "max"
+        }
+        values = analysis.apply_roi(self.data_array, roi)
+        expected = self.data_array.values[0:3, 2:7].max(axis=(0, 1))
+
+        self.assertEqual(values.dims, ("L", "t"))
+        np.testing.assert_array_equal(values.values, expected)
+
+    def test_apply_roi_zero_length_line(self):
+        roi = {"type": "line", "start": [0, 0], "end": [0, 0]}
+        profile = analysis.apply_roi(self.data_array, roi)
+
+        self.assertEqual(profile.shape, (2, 3, 2))
+        np.testing.assert_array_equal(profile[0], profile[1])
+
+    def test_save_load_roi_invalid_type(self):
+        with self.assertRaises(ValueError) as context:
+            analysis.save_roi({"type": "circle"}, "roi.json")
+        self.assertEqual(str(context.exception), "ROI type must be 'rect' or 'line'.")
+
+    def test_batch_apply_roi(self):
+        roi = {"type": "line", "start": [-1, -1], "end": [8.5, 11]}
+        roi_path = os.path.join(self.temp_dir, "roi.json")
+        analysis.save_roi(roi, roi_path)
+
+        for i in range(3):
+            io.create_iau(
+                iau_path=os.path.join(self.temp_dir, f"scan{i}.iau"),
+                data=self.data_array.values + i,
+                coords=[self.data_array[d].values.tolist() for d in self.data_array.dims],
+                dims=list(self.data_array.dims)
+            )
+
+        results = analysis.batch_apply_roi(self.temp_dir, roi_path, n_workers=2)
+        expected = analysis.apply_roi(self.data_array, roi)
+
+        self.assertEqual(len(results), 3)
+        for i in range(3):
+            xr.testing.assert_allclose(results[i], expected + i)
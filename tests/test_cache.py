@@ -0,0 +1,51 @@
+"""
+Tests for utilities/cache.py
+"""
+
+# ----------------------------------------------------------------------------------
+
+import unittest
+
+from iautil.utilities.cache import LRUCache
+
+# ----------------------------------------------------------------------------------
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_get_counts_hits_and_misses(self):
+        cache = LRUCache(max_bytes=100)
+        cache.put("a", 1, 10)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_bytes=30)
+        cache.put("a", 1, 10)
+        cache.put("b", 2, 10)
+        cache.put("c", 3, 10)
+        cache.get("a")
+        cache.put("d", 4, 10)
+
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+        self.assertEqual(cache.nbytes, 30)
+
+    def test_value_larger_than_cache_not_stored(self):
+        cache = LRUCache(max_bytes=30)
+        cache.put("a", 1, 10)
+        cache.put("b", 2, 40)
+
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 1)
+
+    def test_replace_updates_size(self):
+        cache = LRUCache(max_bytes=30)
+        cache.put("a", 1, 10)
+        cache.put("a", 2, 20)
+
+        self.assertEqual(cache.get("a"), 2)
+        self.assertEqual(cache.nbytes, 20)
+
+# ----------------------------------------------------------------------------------
@@ -0,0 +1,258 @@
+"""
+Tests for the parts of plotting/image_tool/controller.py that do not need 
+widgets, run offscreen
+"""
+
+# ----------------------------------------------------------------------------------
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from concurrent import futures
+import numpy as np
+import pyqtgraph as pg
+from PyQt5 import QtCore
+import shutil
+import tempfile
+from types import SimpleNamespace
+import unittest
+from unittest import mock
+
+from iautil import io
+from iautil.plotting.image_tool import controller
+from iautil.plotting.image_tool.controller import (
+    AxisPermutation, 
+    SlicePrefetcher, 
+    UpdateScheduler
+)
+
+# ----------------------------------------------------------------------------------
+
+class TestAxisPermutation(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.iau_path = os.path.join(self.temp_dir, "pyramid.iau")
+
+        shape = (64, 64, 10)
+        data = np.random.default_rng(0).random(shape)
+        data[:, :, 3] = 0
+        io.create_iau(
+            iau_path=self.iau_path,
+            data=data,
+            coords=[np.arange(n) for n in shape],
+            dims=["a", "b", "c"],
+            pyramid_levels=2
+        )
+        self.data_array = io.iau_to_data_array(self.iau_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_pyramid(self):
+        axis_permutation = AxisPermutation(self.data_array)
+        self.assertEqual(axis_permutation.get_n_levels(), 2)
+        self.assertEqual(axis_permutation.get_n_levels(("c", "a", "b")), 0)
+
+        # Levels apply to a transposed array as well
+        axis_permutation = AxisPermutation(self.data_array.transpose("b", "a", "c"))
+        self.assertEqual(axis_permutation.get_n_levels(), 2)
+        plane = axis_permutation.get_plane([4], pyramid_level=1)
+        self.assertEqual(plane.dims, ("b", "a"))
+        self.assertEqual(plane.shape, (32, 32))
+
+    def test_pyramid_cropped(self):
+        cropped = self.data_array.isel(a=slice(0, 16))
+        self.assertEqual(AxisPermutation(cropped).get_n_levels(), 0)
+
+        cropped = self.data_array.isel(c=slice(2, 6))
+        self.assertEqual(AxisPermutation(cropped).get_n_levels(), 0)
+
+    def test_pyramid_sliced(self):
+        axis_permutation = AxisPermutation(self.data_array[:, :, 5])
+        self.assertEqual(axis_permutation.pyramid, [])
+        self.assertEqual(axis_permutation.get_plane([]).shape, (64, 64))
+
+    def test_stats(self):
+        axis_permutation = AxisPermutation(self.data_array.transpose("c", "b", "a"))
+        self.assertEqual(axis_permutation.get_plane_stats([3], ("a", "b", "c")), {
+            "min": 0, "max": 0, "positive_min": np.inf, "sum": 0, "nonzero": 0
+        })
+        self.assertEqual(
+            axis_permutation.get_plane_stats([4], ("b", "a", "c"))["max"],
+            self.data_array[:, :, 4].max()
+        )
+        self.assertIsNone(axis_permutation.get_plane_stats([3], ("a", "c", "b")))
+
+    def test_stats_sliced(self):
+        axis_permutation = AxisPermutation(self.data_array[:, :, 5])
+        self.assertIsNone(axis_permutation.stats)
+        self.assertIsNone(axis_permutation.get_plane_stats([]))
+
+    def test_stats_cropped(self):
+        # Plane 0 of the cropped array is plane 3 of the file, which is empty
+        cropped = self.data_array.isel(c=slice(3, 8))
+        self.assertIsNone(AxisPermutation(cropped).get_plane_stats([0]))
+
+        cropped = self.data_array.isel(a=slice(0, 16))
+        self.assertIsNone(AxisPermutation(cropped).get_plane_stats([3]))
+
+# ----------------------------------------------------------------------------------
+
+class TestUpdateScheduler(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = pg.mkQApp()
+
+    def setUp(self):
+        self.runs = []
+        self.scheduler = UpdateScheduler(lambda: self.runs.append(self.now), 10)
+
+        # Fake clock, in seconds
+        self.now = 100.0
+        patcher = mock.patch.object(controller, "time")
+        self.addCleanup(patcher.stop)
+        patcher.start().perf_counter.side_effect = lambda: self.now
+
+    def test_idle_request_runs(self):
+        self.scheduler.request()
+        self.assertEqual(self.runs, [100.0])
+        self.assertFalse(self.scheduler.timer.isActive())
+
+        self.now = 100.2
+        self.scheduler.request(5)
+        self.assertEqual(self.runs, [100.0, 100.2])
+
+    def test_requests_coalesced(self):
+        self.scheduler.request()
+
+        # Requests within the frame interval wait for its end and merge
+        self.now = 100.04
+        for i in range(5):
+            self.scheduler.request()
+        self.assertEqual(self.runs, [100.0])
+        self.assertTrue(self.scheduler.timer.isActive())
+        self.assertEqual(self.scheduler.timer.interval(), 60)
+
+        self.now = 100.1
+        self.scheduler.timer.stop()
+        self.scheduler.timer.timeout.emit()
+        self.assertEqual(self.runs, [100.0, 100.1])
+
+        # The interval restarts from the merged run
+        self.now = 100.15
+        self.scheduler.request()
+        self.assertEqual(self.runs, [100.0, 100.1])
+
+    def test_set_max_fps(self):
+        self.scheduler.set_max_fps(2)
+        self.scheduler.request()
+        self.now = 100.4
+        self.scheduler.request()
+        self.assertEqual(self.scheduler.timer.interval(), 100)
+
+        with self.assertRaises(ValueError):
+            self.scheduler.set_max_fps(0)
+
+# ----------------------------------------------------------------------------------
+
+class _PrefetchController(QtCore.QObject):
+    """
+    Stands in for a DataArrayController with a single z dimension of size 10.
+    """
+
+    def __init__(self) -> None:
+        super(_PrefetchController, self).__init__()
+
+        self.axis_permutation = SimpleNamespace(
+            dims=("x", "y", "z"), get_sizes=lambda: (10,)
+        )
+        self.plane_cache = {}
+        self.rendered = []
+
+    def get_plane_key(self, indices: list) -> tuple:
+        return (self.axis_permutation.dims, tuple(indices))
+
+    def render_plane(self, key: tuple) -> tuple:
+        self.rendered.append(key[1][0])
+        return key
+
+    def cache_plane(self, key: tuple, plane: tuple) -> None:
+        self.plane_cache[key] = plane
+
+# ----------------------------------------------------------------------------------
+
+class TestSlicePrefetcher(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = pg.mkQApp()
+
+    def setUp(self):
+        self.controller = _PrefetchController()
+        self.prefetcher = SlicePrefetcher(self.controller, depth=2)
+
+    def tearDown(self):
+        self.prefetcher.executor.shutdown()
+
+    def _wait(self) -> None:
+        # The single worker runs jobs in order, then queued signals are delivered
+        self.prefetcher.executor.submit(lambda: None).result()
+        self.app.processEvents()
+
+    def _cached(self) -> list:
+        return sorted(key[1][0] for key in self.controller.plane_cache)
+
+    def test_jump(self):
+        # Without a previous plane, both neighbours are prefetched
+        self.prefetcher.prefetch([5])
+        self._wait()
+        self.assertEqual(self.controller.rendered, [6, 7, 4, 3])
+        self.assertEqual(self._cached(), [3, 4, 6, 7])
+        self.assertEqual(self.prefetcher.pending, {})
+
+        # Planes outside the array are skipped
+        self.prefetcher.prefetch([0])
+        self._wait()
+        self.assertEqual(self.controller.rendered[4:], [1, 2])
+
+    def test_scrub(self):
+        self.prefetcher.prefetch([5])
+        self._wait()
+
+        # Only planes ahead in the direction of motion, cached ones skipped
+        self.prefetcher.prefetch([6])
+        self._wait()
+        self.assertEqual(self.controller.rendered[4:], [8])
+
+        # Steps follow the stride of motion
+        self.prefetcher.prefetch([4])
+        self._wait()
+        self.assertEqual(self.controller.rendered[5:], [2, 0])
+
+    def test_axis_reorder(self):
+        self.prefetcher.prefetch([5])
+        self._wait()
+        generation = self.prefetcher.generation
+
+        # Same indices on other axes are a jump
+        self.controller.axis_permutation.dims = ("x", "z", "y")
+        self.prefetcher.prefetch([6])
+        self._wait()
+        self.assertEqual(self.prefetcher.generation, generation + 1)
+        self.assertEqual(self.controller.rendered[4:], [7, 8, 5, 4])
+
+    def test_stale_result(self):
+        key = self.controller.get_plane_key([3])
+        self.prefetcher.pending[key] = futures.Future()
+        self.prefetcher.cancel()
+
+        # Results of an older generation are dropped
+        self.prefetcher._store_plane(key, key, self.prefetcher.generation - 1)
+        self.assertEqual(self.controller.plane_cache, {})
+
+# ----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
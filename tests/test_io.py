@@ -4,9 +4,15 @@ Tests for io.py
 
 # ----------------------------------------------------------------------------------
 
+import h5py
+import importlib.util
 import numpy as np
 import os
+import pickle
+import shutil
+import tempfile
 import unittest
+from unittest import mock
 
 from iautil import io
 
@@ -87,6 +93,28 @@ class TestIO(unittest.TestCase):
             )
         self.assertEqual(str(context.exception), "Dimension sizes for coords and dims do not match.")
 
+    def test_create_iau_plane_chunks(self):
+        io.create_iau(
+            iau_path=self.scan40_iau_path,
+            data=np.zeros((4, 5, 6, 2)),
+            coords=[list(range(4)), list(range(5)), list(range(6)), [0, 1]],
+            compression="gzip",
+            shuffle=True
+        )
+        with h5py.File(self.scan40_iau_path, "r") as iau_file:
+            self.assertEqual(iau_file["data"].chunks, (4, 5, 1, 1))
+            self.assertEqual(iau_file["data"].compression, "gzip")
+            self.assertTrue(iau_file["data"].shuffle)
+
+    def test_create_iau_invalid_compression(self):
+        with self.assertRaises(ValueError) as context:
+            io.create_iau(
+                iau_path=self.scan40_iau_path,
+                data=np.array([[1, 2, 3], [4, 5, 6]]),
+                compression="zip"
+            )
+        self.assertEqual(str(context.exception), "compression must be 'gzip' or 'lzf'.")
+
     def test_vti_to_iau_3d_successful(self):
 
         io.vti_to_iau(
@@ -101,6 +129,583 @@ class TestIO(unittest.TestCase):
             iau_path=self.scan40_iau_path
         )
 
+    def test_iau_to_data_array_lazy(self):
+        data = np.arange(24).reshape(2, 3, 4)
+        io.create_iau(
+            iau_path=self.scan40_iau_path,
+            data=data,
+            coords=[[0, 1], [0, 1, 2], [0, 1, 2, 3]],
+            dims=["a", "b", "c"],
+            metadata={"name" : "scan40"}
+        )
+
+        data_array = io.iau_to_data_array(self.scan40_iau_path, lazy=True)
+        self.assertFalse(isinstance(data_array.variable._data, np.ndarray))
+        self.assertEqual(data_array.shape, data.shape)
+        self.assertTrue(np.array_equal(data_array[:, :, 2].values, data[:, :, 2]))
+        self.assertTrue(np.array_equal(data_array.values, data))
+        data_array.close()
+
+    def test_iau_to_data_array_lazy_pickle(self):
+        data = np.arange(24).reshape(2, 3, 4)
+        io.create_iau(
+            iau_path=self.scan40_iau_path,
+            data=data,
+            coords=[[0, 1], [0, 1, 2], [0, 1, 2, 3]],
+            dims=["a", "b", "c"]
+        )
+
+        data_array = io.iau_to_data_array(self.scan40_iau_path, lazy=True)
+        unpickled = pickle.loads(pickle.dumps(data_array))
+        copied = data_array.copy(deep=True)
+        self.assertTrue(np.array_equal(unpickled.values, data))
+        self.assertTrue(np.array_equal(copied[:, 1].values, data[:, 1]))
+        data_array.close()
+
+    def test_vti_to_iau_4d_parallel(self):
+        io.vti_to_iau(
+            vti_path=self.scans_vti_path,
+            iau_path=self.scan40_iau_path
+        )
+        serial_data_array = io.iau_to_data_array(self.scan40_iau_path)
+        os.remove(self.scan40_iau_path)
+
+        for use_processes in [False, True]:
+            io.vti_to_iau(
+                vti_path=self.scans_vti_path,
+                iau_path=self.scan40_iau_path,
+                n_workers=2,
+                use_processes=use_processes
+            )
+            data_array = io.iau_to_data_array(self.scan40_iau_path)
+            os.remove(self.scan40_iau_path)
+            self.assertTrue(data_array.equals(serial_data_array))
+
+    def test_vti_to_iau_4d_streaming(self):
+        io.vti_to_iau(
+            vti_path=self.scans_vti_path,
+            iau_path=self.scan40_iau_path
+        )
+        stacked_data_array = io.iau_to_data_array(self.scan40_iau_path)
+        os.remove(self.scan40_iau_path)
+
+        io.vti_to_iau(
+            vti_path=self.scans_vti_path,
+            iau_path=self.scan40_iau_path,
+            streaming=True,
+            n_workers=2
+        )
+        data_array = io.iau_to_data_array(self.scan40_iau_path)
+        self.assertTrue(data_array.equals(stacked_data_array))
+
+    def test_vti_to_iau_streaming_invalid_dims(self):
+        with self.assertRaises(RuntimeError) as context:
+            io.vti_to_iau(
+                vti_path=self.scans_vti_path,
+                iau_path=self.scan40_iau_path,
+                dims=["H", "K", "L"],
+                streaming=True
+            )
+        self.assertEqual(
+            str(context.exception), 
+            "Dimension sizes for coords and dims do not match."
+        )
+
+        # Fails before any data is written
+        with h5py.File(self.scan40_iau_path, "r") as iau_file:
+            self.assertNotIn("data", iau_file)
+
+    def test_check_coords_tolerance(self):
+        coords = [np.linspace(0, 1, 5), np.arange(3)]
+        io._check_coords([coords, [coords[0] + 1e-12, coords[1]]])
+
+    def test_check_coords_reports_file(self):
+        coords = [np.linspace(0, 1, 5), np.arange(3)]
+        with self.assertRaises(ValueError) as context:
+            io._check_coords(
+                [coords, coords, [coords[0], np.arange(4)], [coords[0] + 1, coords[1]]],
+                ["a.vti", "b.vti", "c.vti", "d.vti"]
+            )
+        self.assertEqual(
+            str(context.exception),
+            "Inconsistent coords throughout data source files: "
+            "c.vti differs from a.vti."
+        )
+
+    def test_read_vti_matches_vtk(self):
+        import vtk
+
+        reader = vtk.vtkXMLImageDataReader()
+        reader.SetFileName(self.scan40_vti_path)
+        reader.Update()
+
+        with tempfile.TemporaryDirectory() as vti_dir:
+            vti_paths = io._list_vti(self.scans_vti_path)
+
+            # Ascii, inline base64, raw appended, and big-endian UInt64 headers
+            for i, mode in enumerate(["Ascii", "Binary", "Appended", "Appended"]):
+                writer = vtk.vtkXMLImageDataWriter()
+                writer.SetInputData(reader.GetOutput())
+                writer.SetFileName(os.path.join(vti_dir, f"{i}.vti"))
+                getattr(writer, f"SetDataModeTo{mode}")()
+                writer.SetEncodeAppendedData(False)
+                if i == 3:
+                    writer.SetHeaderTypeToUInt64()
+                    writer.SetByteOrderToBigEndian()
+                    writer.SetCompressorTypeToNone()
+                writer.Write()
+                vti_paths.append(writer.GetFileName())
+
+            for vti_path in vti_paths:
+                data, coords = io._read_vti(vti_path)
+                vtk_data, vtk_coords = io._load_vti_vtk(vti_path)
+                self.assertEqual(data.dtype, vtk_data.dtype)
+                self.assertTrue(np.array_equal(data, vtk_data))
+                for axis, vtk_axis in zip(coords, vtk_coords):
+                    self.assertTrue(np.array_equal(axis, vtk_axis))
+
+    def test_load_vti_vtk_fallback(self):
+        import vtk
+
+        reader = vtk.vtkXMLImageDataReader()
+        reader.SetFileName(self.scan40_vti_path)
+        reader.Update()
+
+        with tempfile.TemporaryDirectory() as vti_dir:
+            writer = vtk.vtkXMLImageDataWriter()
+            writer.SetInputData(reader.GetOutput())
+            writer.SetFileName(os.path.join(vti_dir, "lz4.vti"))
+            writer.SetCompressorTypeToLZ4()
+            writer.Write()
+
+            with self.assertRaises(io._UnsupportedVTIError):
+                io._read_vti(writer.GetFileName())
+            data, coords = io._load_vti(writer.GetFileName())
+
+        self.assertTrue(np.array_equal(data, io._read_vti(self.scan40_vti_path)[0]))
+
+    def test_read_vti_unsupported_type(self):
+        with open(self.scan40_vti_path, "rb") as vti_file:
+            content = vti_file.read()
+
+        with tempfile.TemporaryDirectory() as vti_dir:
+            vti_path = os.path.join(vti_dir, "bit.vti")
+            with open(vti_path, "wb") as vti_file:
+                vti_file.write(content.replace(b'type="Float32"', b'type="Bit"'))
+
+            with self.assertRaises(io._UnsupportedVTIError) as context:
+                io._read_vti(vti_path)
+        self.assertEqual(str(context.exception), "Unsupported type Bit.")
+
+    def test_append_vti_to_iau(self):
+        io.vti_to_iau(
+            vti_path=self.scans_vti_path,
+            iau_path=self.scan40_iau_path
+        )
+        full_data_array = io.iau_to_data_array(self.scan40_iau_path)
+        os.remove(self.scan40_iau_path)
+
+        vti_files = io._list_vti(self.scans_vti_path)
+        with tempfile.TemporaryDirectory() as vti_dir:
+            shutil.copy(vti_files[0], vti_dir)
+            io.vti_to_iau(
+                vti_path=vti_dir,
+                iau_path=self.scan40_iau_path,
+                streaming=True
+            )
+
+            for vti_file in vti_files[1:]:
+                shutil.copy(vti_file, vti_dir)
+            appended_files = io.append_vti_to_iau(vti_dir, self.scan40_iau_path)
+            self.assertEqual(len(appended_files), len(vti_files) - 1)
+            self.assertEqual(io.append_vti_to_iau(vti_dir, self.scan40_iau_path), [])
+
+        data_array = io.iau_to_data_array(self.scan40_iau_path)
+        self.assertTrue(data_array.equals(full_data_array))
+
+    def test_append_vti_to_iau_not_resizable(self):
+        io.vti_to_iau(
+            vti_path=self.scan40_vti_path,
+            iau_path=self.scan40_iau_path
+        )
+        with self.assertRaises(RuntimeError) as context:
+            io.append_vti_to_iau(self.scan40_vti_path, self.scan40_iau_path)
+        self.assertEqual(str(context.exception), "IAU file data is not resizable.")
+
+    def test_create_iau_pyramid(self):
+        data = np.arange(5 * 6 * 2, dtype=float).reshape(5, 6, 2)
+        io.create_iau(
+            iau_path=self.scan40_iau_path,
+            data=data,
+            coords=[list(range(5)), list(range(6)), [0, 1]],
+            dims=["a", "b", "c"],
+            pyramid_levels=2
+        )
+
+        data_array = io.iau_to_data_array(self.scan40_iau_path)
+        pyramid = data_array.encoding["pyramid"]
+        self.assertEqual([level.shape for level in pyramid], [(3, 3, 2), (2, 2, 2)])
+        self.assertEqual(list(pyramid[0].coords["a"].values), [0, 2, 4])
+        self.assertEqual(pyramid[0].values[0, 0, 1], np.mean(data[:2, :2, 1]))
+        self.assertEqual(pyramid[0].values[2, 2, 0], np.mean(data[4:, 4:, 0]))
+        self.assertEqual(pyramid[1].values[1, 1, 0], np.mean(data[4:, 4:, 0]))
+
+    def test_create_iau_pyramid_blocks(self):
+        data = np.random.default_rng(0).random((9, 7, 5, 3)).astype(np.float32)
+
+        # Levels built from memory in several blocks match levels read from file
+        with h5py.File(self.scan40_iau_path, "w") as iau_file:
+            iau_file.create_dataset("data", data=data)
+            io._write_pyramid(iau_file, 2)
+            expected = [iau_file[f"pyramid/level_{i}"][...] for i in (1, 2)]
+        os.remove(self.scan40_iau_path)
+
+        with mock.patch.object(io, "_PYRAMID_BLOCK_SIZE", 100):
+            io.create_iau(
+                iau_path=self.scan40_iau_path,
+                data=data,
+                coords=[np.arange(n) for n in data.shape],
+                pyramid_levels=2
+            )
+
+        pyramid = io.iau_to_data_array(self.scan40_iau_path).encoding["pyramid"]
+        for level, expected_level in zip(pyramid, expected):
+            self.assertEqual(level.dtype, np.float32)
+            self.assertTrue(np.array_equal(level.values, expected_level))
+
+    def test_create_iau_invalid_pyramid_levels(self):
+        with self.assertRaises(ValueError) as context:
+            io.create_iau(
+                iau_path=self.scan40_iau_path, 
+                data=np.zeros((2, 2)), 
+                pyramid_levels=-1
+            )
+        self.assertEqual(
+            str(context.exception), 
+            "pyramid_levels must be a non-negative integer."
+        )
+
+    def test_append_vti_to_iau_pyramid(self):
+        io.vti_to_iau(
+            vti_path=self.scans_vti_path,
+            iau_path=self.scan40_iau_path,
+            pyramid_levels=1
+        )
+        full_pyramid = io.iau_to_data_array(self.scan40_iau_path).encoding["pyramid"]
+        os.remove(self.scan40_iau_path)
+
+        vti_files = io._list_vti(self.scans_vti_path)
+        with tempfile.TemporaryDirectory() as vti_dir:
+            shutil.copy(vti_files[0], vti_dir)
+            io.vti_to_iau(
+                vti_path=vti_dir,
+                iau_path=self.scan40_iau_path,
+                streaming=True,
+                pyramid_levels=1
+            )
+            for vti_file in vti_files[1:]:
+                shutil.copy(vti_file, vti_dir)
+            io.append_vti_to_iau(vti_dir, self.scan40_iau_path)
+
+        pyramid = io.iau_to_data_array(self.scan40_iau_path).encoding["pyramid"]
+        self.assertTrue(pyramid[0].equals(full_pyramid[0]))
+
+    def test_create_iau_stats(self):
+        data = np.array([[[0, 1], [0, 2]], [[0, -3], [0, 8]]])
+
+        # Histogram bins come from binary exponents in any precision
+        for dtype in [np.float64, np.float32, np.int16]:
+            io.create_iau(
+                iau_path=self.scan40_iau_path,
+                data=data.astype(dtype),
+                coords=[[0, 1], [0, 1], [0, 1]],
+                dims=["a", "b", "c"]
+            )
+
+            data_array = io.iau_to_data_array(self.scan40_iau_path)
+            self.assertTrue(data_array.identical(data_array.copy(deep=True)))
+
+            stats = data_array.encoding["stats"]
+            self.assertEqual(list(stats["min"].values), [0, -3])
+            self.assertEqual(list(stats["max"].values), [0, 8])
+            self.assertEqual(list(stats["positive_min"].values), [np.inf, 1])
+            self.assertEqual(list(stats["sum"].values), [0, 8])
+            self.assertEqual(list(stats["nonzero"].values), [0, 4])
+            self.assertEqual(list(stats["histogram"].values), [1, 1, 0, 1])
+            self.assertEqual(
+                list(stats["histogram_bin_edges"].values), [1, 2, 4, 8, 16]
+            )
+            os.remove(self.scan40_iau_path)
+
+    def test_create_iau_stats_disabled(self):
+        io.create_iau(
+            iau_path=self.scan40_iau_path,
+            data=np.ones((2, 2, 2)),
+            coords=[[0, 1], [0, 1], [0, 1]],
+            stats=False
+        )
+        self.assertNotIn(
+            "stats", io.iau_to_data_array(self.scan40_iau_path).encoding
+        )
+
+    def test_create_iau_no_stats(self):
+        # 1D, bool, and complex data are stored without statistics
+        for data in [
+            np.arange(4.0), 
+            np.eye(3, dtype=bool), 
+            np.ones((3, 3), dtype=complex)
+        ]:
+            io.create_iau(
+                iau_path=self.scan40_iau_path,
+                data=data,
+                coords=[np.arange(n) for n in data.shape]
+            )
+
+            data_array = io.iau_to_data_array(self.scan40_iau_path)
+            self.assertTrue(np.array_equal(data_array.values, data))
+            self.assertNotIn("stats", data_array.encoding)
+            os.remove(self.scan40_iau_path)
+
+    def test_append_vti_to_iau_stats(self):
+        io.vti_to_iau(
+            vti_path=self.scans_vti_path,
+            iau_path=self.scan40_iau_path
+        )
+        full_stats = io.iau_to_data_array(self.scan40_iau_path).encoding["stats"]
+        os.remove(self.scan40_iau_path)
+
+        vti_files = io._list_vti(self.scans_vti_path)
+        with tempfile.TemporaryDirectory() as vti_dir:
+            shutil.copy(vti_files[0], vti_dir)
+            io.vti_to_iau(vti_path=vti_dir, iau_path=self.scan40_iau_path)
+            for vti_file in vti_files[1:]:
+                shutil.copy(vti_file, vti_dir)
+            io.append_vti_to_iau(vti_dir, self.scan40_iau_path)
+
+        stats = io.iau_to_data_array(self.scan40_iau_path).encoding["stats"]
+        for name in full_stats:
+            self.assertTrue(np.array_equal(stats[name], full_stats[name]))
+
+    def test_vti_to_iau_streaming_stats(self):
+        io.vti_to_iau(
+            vti_path=self.scans_vti_path,
+            iau_path=self.scan40_iau_path
+        )
+        full_stats = io.iau_to_data_array(self.scan40_iau_path).encoding["stats"]
+        os.remove(self.scan40_iau_path)
+
+        io.vti_to_iau(
+            vti_path=self.scans_vti_path,
+            iau_path=self.scan40_iau_path,
+            streaming=True
+        )
+        stats = io.iau_to_data_array(self.scan40_iau_path).encoding["stats"]
+        self.assertTrue(stats.identical(full_stats))
+        os.remove(self.scan40_iau_path)
+
+        # Appending to a file without statistics does not add them
+        vti_files = io._list_vti(self.scans_vti_path)
+        with tempfile.TemporaryDirectory() as vti_dir:
+            shutil.copy(vti_files[0], vti_dir)
+            io.vti_to_iau(
+                vti_path=vti_dir,
+                iau_path=self.scan40_iau_path,
+                streaming=True,
+                stats=False
+            )
+            for vti_file in vti_files[1:]:
+                shutil.copy(vti_file, vti_dir)
+            io.append_vti_to_iau(vti_dir, self.scan40_iau_path)
+
+        self.assertNotIn(
+            "stats", io.iau_to_data_array(self.scan40_iau_path).encoding
+        )
+
+    def test_create_iau_metadata_group(self):
+        metadata = {
+            "name": "scan40",
+            "energy": 10.5,
+            "count": 3,
+            "flag": True,
+            "note": None,
+            "motors": {"th": 1.0, "positions": np.arange(5.0)},
+            "labels": ["a", "b"],
+            "mixed": [1, "a"]
+        }
+        io.create_iau(
+            iau_path=self.scan40_iau_path,
+            data=np.zeros((2, 3)),
+            coords=[[0, 1], [0, 1, 2]],
+            metadata=metadata
+        )
+
+        with h5py.File(self.scan40_iau_path, "r") as iau_file:
+            self.assertNotIn("metadata", iau_file.attrs)
+            self.assertIsInstance(iau_file["metadata/motors/positions"], h5py.Dataset)
+
+        attrs = io.iau_to_data_array(self.scan40_iau_path).attrs
+        self.assertEqual(attrs["name"], "scan40")
+        self.assertEqual(attrs["energy"], 10.5)
+        self.assertEqual(attrs["count"], 3)
+        self.assertIs(attrs["flag"], True)
+        self.assertIsNone(attrs["note"])
+        self.assertEqual(attrs["motors"]["th"], 1.0)
+        self.assertEqual(attrs["mixed"], [1, "a"])
+
+        # Arrays are read when asked for, even after the file is closed
+        positions = attrs["motors"]["positions"]
+        self.assertIsInstance(positions, io.LazyDataset)
+        self.assertEqual(positions.shape, (5,))
+        self.assertTrue(np.array_equal(np.asarray(positions), np.arange(5.0)))
+        self.assertEqual(positions[1:3].tolist(), [1.0, 2.0])
+        self.assertEqual(list(np.asarray(attrs["labels"])), ["a", "b"])
+
+    def test_create_iau_metadata_keys(self):
+        metadata = {
+            "slits/h": np.arange(3.0),
+            "detector/gain": {"value%": 2},
+            "a/b": 1,
+            "_literals": ["x", "y"],
+            "big": 2 ** 70,
+            "bigs": [2 ** 70, -2 ** 70],
+            "mixed": [1, "a"]
+        }
+        io.create_iau(
+            iau_path=self.scan40_iau_path,
+            data=np.zeros((2, 3)),
+            coords=[[0, 1], [0, 1, 2]],
+            metadata=metadata
+        )
+
+        # Keys with "/" are not turned into nested groups
+        with h5py.File(self.scan40_iau_path, "r") as iau_file:
+            self.assertNotIn("slits", iau_file["metadata"])
+
+        attrs = io.iau_to_data_array(self.scan40_iau_path).attrs
+        self.assertEqual(set(attrs), set(metadata))
+        self.assertEqual(list(np.asarray(attrs["slits/h"])), [0, 1, 2])
+        self.assertEqual(attrs["detector/gain"], {"value%": 2})
+        self.assertEqual(attrs["a/b"], 1)
+        self.assertEqual(list(np.asarray(attrs["_literals"])), ["x", "y"])
+        self.assertEqual(attrs["big"], 2 ** 70)
+        self.assertEqual(attrs["bigs"], [2 ** 70, -2 ** 70])
+        self.assertEqual(attrs["mixed"], [1, "a"])
+
+    def test_iau_to_data_array_literal_metadata(self):
+        # Files written before metadata groups
+        with h5py.File(self.scan40_iau_path, "w") as iau_file:
+            iau_file.create_dataset("data", data=np.zeros((2, 3)))
+            io._write_iau_info(iau_file, coords=[[0, 1], [0, 1, 2]])
+            del iau_file["metadata"]
+            iau_file.attrs["metadata"] = str({"name": "scan40", "h": [1, 2]})
+
+        attrs = io.iau_to_data_array(self.scan40_iau_path).attrs
+        self.assertEqual(attrs, {"name": "scan40", "h": [1, 2]})
+
+    def test_create_csv_2d_shared_coords(self):
+        csv_path = os.path.join(self.scans_vti_path, "slice.csv")
+        io.create_csv(
+            data=np.array([[1, 2, 3], [4, 5, 6]]),
+            coords=[[0.1, 0.2], [5, 6], [-1, 0, 1]],
+            labels=["H", "K", "L"],
+            csv_path=csv_path,
+            block_size=4
+        )
+        with open(csv_path) as csv_file:
+            lines = csv_file.read().splitlines()
+        os.remove(csv_path)
+
+        self.assertEqual(lines[0], "H,K,L,Value")
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(lines[1], "0.1,5,-1,1")
+        self.assertEqual(lines[6], "0.2,6,1,6")
+
+    def test_create_csv_3d(self):
+        csv_path = os.path.join(self.scans_vti_path, "slice.csv")
+        io.create_csv(
+            data=np.arange(24).reshape(2, 3, 4),
+            coords=[[0, 1], [0, 1, 2], [0, 1, 2, 3]],
+            labels=["a", "b", "c"],
+            csv_path=csv_path
+        )
+        rows = np.loadtxt(csv_path, delimiter=",", skiprows=1)
+        os.remove(csv_path)
+
+        self.assertEqual(rows.shape, (24, 4))
+        self.assertTrue(np.array_equal(rows[13], [1, 0, 1, 13]))
+
+    @unittest.skipUnless(importlib.util.find_spec("h5netcdf"), "requires h5netcdf")
+    def test_data_array_to_netcdf(self):
+        nc_path = os.path.join(self.scans_vti_path, "scans.nc")
+        io.vti_to_iau(
+            vti_path=self.scans_vti_path,
+            iau_path=self.scan40_iau_path,
+            metadata={"name": "scans", "nested": {"a": 1}}
+        )
+        data_array = io.iau_to_data_array(self.scan40_iau_path, lazy=True)
+        io.data_array_to_netcdf(data_array[:, 2], nc_path)
+
+        nc_data_array = io.netcdf_to_data_array(nc_path)
+        self.assertTrue(np.array_equal(nc_data_array.values, data_array[:, 2].values))
+        self.assertEqual(nc_data_array.dims, data_array[:, 2].dims)
+        self.assertEqual(nc_data_array.attrs, {"name": "scans"})
+        nc_data_array.close()
+        data_array.close()
+        os.remove(nc_path)
+
+    @unittest.skipUnless(importlib.util.find_spec("h5netcdf"), "requires h5netcdf")
+    def test_data_array_to_netcdf_planes(self):
+        nc_path = os.path.join(self.scans_vti_path, "scans.nc")
+        io.vti_to_iau(
+            vti_path=self.scans_vti_path,
+            iau_path=self.scan40_iau_path,
+            metadata={"name": "scans"}
+        )
+        data_array = io.iau_to_data_array(self.scan40_iau_path, lazy=True)
+        data_array = data_array.assign_coords(
+            scan=(data_array.dims[-1], np.arange(data_array.shape[-1]) + 40)
+        )
+        io.data_array_to_netcdf(data_array, nc_path)
+
+        # Written plane by plane, read back as xarray would have written it
+        nc_data_array = io.netcdf_to_data_array(nc_path)
+        self.assertTrue(nc_data_array.identical(io._to_dataset(data_array)[1]["data"]))
+        self.assertEqual(
+            nc_data_array.encoding["chunksizes"], 
+            io._get_plane_chunks(data_array.shape)
+        )
+        nc_data_array.close()
+        data_array.close()
+        os.remove(nc_path)
+
+    @unittest.skipUnless(importlib.util.find_spec("zarr"), "requires zarr")
+    def test_data_array_to_zarr(self):
+        zarr_path = os.path.join(self.scans_vti_path, "scans.zarr")
+        io.vti_to_iau(
+            vti_path=self.scans_vti_path,
+            iau_path=self.scan40_iau_path
+        )
+        data_array = io.iau_to_data_array(self.scan40_iau_path, lazy=True)
+        io.data_array_to_zarr(data_array, zarr_path)
+
+        zarr_data_array = io.zarr_to_data_array(zarr_path)
+        self.assertTrue(np.array_equal(zarr_data_array.values, data_array.values))
+        for dim in data_array.dims:
+            self.assertTrue(np.array_equal(
+                zarr_data_array.coords[dim].values, data_array.coords[dim].values
+            ))
+        data_array.close()
+        shutil.rmtree(zarr_path)
+
+    def test_vti_to_iau_invalid_n_workers(self):
+        with self.assertRaises(ValueError) as context:
+            io.vti_to_iau(
+                vti_path=self.scans_vti_path,
+                iau_path=self.scan40_iau_path,
+                n_workers=0
+            )
+        self.assertEqual(str(context.exception), "n_workers must be a positive integer.")
+
     def tearDown(self):
         if os.path.exists(self.scan40_iau_path):
             os.remove(self.scan40_iau_path)
@@ -0,0 +1,103 @@
+"""
+Tests for SlicingPipeline in plotting/image_tool/slicing.py, run offscreen
+"""
+
+# ----------------------------------------------------------------------------------
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pyqtgraph as pg
+import time
+import unittest
+import xarray as xr
+
+from iautil.plotting.image_tool import ImageToolWidget
+
+# ----------------------------------------------------------------------------------
+
+class TestSlicingPipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = pg.mkQApp()
+
+    def setUp(self):
+        shape = (20, 25, 10, 4)
+        data_array = xr.DataArray(
+            np.random.default_rng(0).random(shape) + 1,
+            coords=[np.arange(n) * 0.5 for n in shape],
+            dims=["H", "K", "L", "t"]
+        )
+        self.widget = ImageToolWidget(data_array)
+        self.pipeline = self.widget.slicing_tab.pipeline
+        self.levels = self.widget.slicing_tab.slicing_widgets
+
+    def tearDown(self):
+        self.widget.deleteLater()
+
+    def _set_enabled(self, i: int, enabled: bool) -> None:
+        self.levels[i].controller.enable_chkbx.setChecked(enabled)
+
+    def test_enable(self):
+        self._set_enabled(0, True)
+
+        self.assertGreater(self.pipeline.compute_counts[0], 0)
+        self.assertEqual(self.pipeline.compute_counts[1:], [0, 0])
+        self.assertIsNotNone(self.levels[0].image_view.image)
+
+    def test_roi_change_recomputes_children(self):
+        self._set_enabled(0, True)
+        self._set_enabled(1, True)
+        self.pipeline.reset_counts()
+
+        self.levels[0].roi.setPos(self.levels[0].roi.pos() + pg.Point(0.5, 0))
+        self.assertEqual(self.pipeline.last_computed, [0, 1])
+        self.assertEqual(self.pipeline.compute_counts, [1, 1, 0])
+
+        # Moving the child ROI leaves its parent alone
+        self.levels[1].roi.setPos(self.levels[1].roi.pos() + pg.Point(0.5, 0))
+        self.assertEqual(self.pipeline.last_computed, [1])
+        self.assertEqual(self.pipeline.compute_counts, [1, 2, 0])
+
+    def test_slider_only_redisplays(self):
+        self._set_enabled(0, True)
+        self.pipeline.reset_counts()
+
+        self.levels[0].slider.value_slider.setValue(2)
+        scheduler = self.levels[0].slider_scheduler
+        while scheduler.timer.isActive():
+            time.sleep(0.001)
+            self.app.processEvents()
+
+        self.assertEqual(self.pipeline.compute_counts, [0, 0, 0])
+        self.assertEqual(self.pipeline.display_counts, [1, 0, 0])
+
+    def test_invalidate(self):
+        self._set_enabled(0, True)
+        self.pipeline.reset_counts()
+
+        self.pipeline.invalidate()
+        self.assertEqual(self.pipeline.compute_counts, [1, 0, 0])
+
+        # Nothing changed since
+        self.pipeline.update()
+        self.assertEqual(self.pipeline.compute_counts, [1, 0, 0])
+        self.assertEqual(self.pipeline.skip_counts, [1, 0, 0])
+
+    def test_reenable(self):
+        self._set_enabled(0, True)
+        self._set_enabled(0, False)
+        self.assertIsNone(self.levels[0].image_view.image)
+
+        self.pipeline.reset_counts()
+        self._set_enabled(0, True)
+        self.assertEqual(self.pipeline.compute_counts, [1, 0, 0])
+        self.assertEqual(self.pipeline.display_counts, [1, 0, 0])
+        self.assertIsNotNone(self.levels[0].image_view.image)
+
+# ----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Tests for the normalization in utilities/ui.py, run offscreen
+"""
+
+# ----------------------------------------------------------------------------------
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pyqtgraph as pg
+import unittest
+import xarray as xr
+
+from iautil.utilities.ui import DataArrayImageView
+
+# ----------------------------------------------------------------------------------
+
+class TestNormalize(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = pg.mkQApp()
+        cls.image_view = DataArrayImageView()
+
+    def setUp(self):
+        self.image = np.array([[-1.0, 0.0, 1.0], [10.0, 100.0, 1000.0]])
+
+    def test_linear(self):
+        # Strided slices are made contiguous
+        image, levels = self.image_view._normalize(self.image.T, "linear", 0.5)
+        self.assertTrue(image.flags.c_contiguous)
+        self.assertTrue(np.array_equal(image, self.image.T))
+        self.assertEqual(levels, (-1, 1000))
+
+        image, levels = self.image_view._normalize(
+            self.image, "linear", 0.5, value_range=(-10, 1, 10)
+        )
+        self.assertTrue(np.array_equal(image, self.image))
+        self.assertEqual(levels, (-10, 10))
+
+        # Flat images get a nonzero level range
+        image, levels = self.image_view._normalize(np.ones((2, 2)), "linear", 0.5)
+        self.assertEqual(levels, (1, 2))
+
+    def test_log(self):
+        image, levels = self.image_view._normalize(self.image, "log", 0.5)
+        self.assertEqual(image.dtype, np.float32)
+        self.assertTrue(np.allclose(image, [[0, 0, 0], [1, 2, 3]]))
+        self.assertTrue(np.allclose(levels, (0, 3)))
+
+        # Values below the known smallest positive value take the lowest color
+        image, levels = self.image_view._normalize(
+            self.image, "log", 0.5, value_range=(-1, 10, 10000)
+        )
+        self.assertTrue(np.allclose(image, [[1, 1, 1], [1, 2, 3]]))
+        self.assertTrue(np.allclose(levels, (1, 4)))
+
+        image, levels = self.image_view._normalize(-self.image ** 2, "log", 0.5)
+        self.assertTrue(np.array_equal(image, np.zeros((2, 3))))
+        self.assertEqual(levels, (0, 1))
+
+    def test_power(self):
+        image, levels = self.image_view._normalize(self.image, "power", 0.5)
+        self.assertEqual(image.dtype, np.float32)
+        self.assertTrue(np.allclose(image, np.sqrt(self.image + 1)))
+        self.assertTrue(np.allclose(levels, (0, np.sqrt(1001))))
+
+        image, levels = self.image_view._normalize(
+            self.image, "power", 2, value_range=(-2, 1, 1000)
+        )
+        self.assertTrue(np.allclose(image, (self.image + 2) ** 2))
+        self.assertTrue(np.allclose(levels, (0, 1002 ** 2)))
+
+    def test_render_slice(self):
+        data_array_slice = xr.DataArray(self.image, dims=["x", "y"])
+
+        # Current settings are used unless given
+        self.image_view.set_norm("power", 2)
+        image, levels = self.image_view.render_slice(data_array_slice)
+        self.assertTrue(np.allclose(image, (self.image + 1) ** 2))
+
+        image, levels = self.image_view.render_slice(data_array_slice, norm="linear")
+        self.assertEqual(levels, (-1, 1000))
+
+        self.image_view.set_norm("log", 0.5)
+        with self.assertRaises(ValueError):
+            self.image_view.set_norm("sqrt")
+
+# ----------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()